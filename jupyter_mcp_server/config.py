@@ -7,28 +7,93 @@ Global configuration variables for Jupyter MCP Server.
 """
 
 import os
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Final
 
-###############################################################################
-# Transport & Provider Configuration
-###############################################################################
+# Snapshot of the process environment, read once at import.
+_ENV: dict[str, str] = os.environ.copy()
 
-TRANSPORT: str = os.getenv("TRANSPORT", "stdio")
-PROVIDER: str = os.getenv("PROVIDER", "jupyter")
+# Accepted spellings for boolean flags, compared without lowercasing
+_TRUTHY: frozenset[str] = frozenset({"true", "True", "TRUE", "1", "yes", "on"})
 
-###############################################################################
-# Runtime Configuration
-###############################################################################
 
-RUNTIME_URL: str = os.getenv("RUNTIME_URL", "http://localhost:8888")
-START_NEW_RUNTIME: bool = os.getenv("START_NEW_RUNTIME", "false").lower() == "true"
-RUNTIME_ID: str | None = os.getenv("RUNTIME_ID")
-RUNTIME_TOKEN: str | None = os.getenv("RUNTIME_TOKEN")
+def _get(name: str, default: Any = None, cast: Callable[[str], Any] = str) -> Any:
+    """Read a variable from the environment snapshot, casting it once."""
+    value = _ENV.get(name)
+    if value is None:
+        return default
+    return cast(value)
 
-###############################################################################
-# Room Configuration  
-###############################################################################
 
-ROOM_URL: str = os.getenv("ROOM_URL", "http://localhost:8888")
-ROOM_ID: str = os.getenv("ROOM_ID", "notebook.ipynb")
-ROOM_TOKEN: str | None = os.getenv("ROOM_TOKEN")
- 
\ No newline at end of file
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Runtime configuration shared by the server, tools and routes.
+
+    Instances are immutable; a change swaps in a whole new ``Config`` so
+    readers holding the old one never see a half-applied update.
+    """
+
+    ###########################################################################
+    # Transport & Provider Configuration
+    ###########################################################################
+
+    TRANSPORT: str
+    PROVIDER: str
+
+    ###########################################################################
+    # Runtime Configuration
+    ###########################################################################
+
+    RUNTIME_URL: str
+    START_NEW_RUNTIME: bool
+    RUNTIME_ID: str | None
+    RUNTIME_TOKEN: str | None
+
+    ###########################################################################
+    # Room Configuration
+    ###########################################################################
+
+    ROOM_URL: str
+    ROOM_ID: str
+    ROOM_TOKEN: str | None
+
+    def replace(self, **fields: Any) -> "Config":
+        """Return a copy with several settings changed, keyed by lowercase field name."""
+        return replace(self, **{name.upper(): value for name, value in fields.items()})
+
+
+# Values seen at process start. These never change; the CLI may still
+# override the live settings through ``set_config`` before serving.
+TRANSPORT: Final[str] = _get("TRANSPORT", "stdio")
+PROVIDER: Final[str] = _get("PROVIDER", "jupyter")
+
+# Number of pre-started spare kernels kept ready to replace the active one
+KERNEL_POOL: Final[int] = _get("KERNEL_POOL", 0, int)
+
+# Worker threads for short blocking calls (REST probes, session lookups)
+THREAD_POOL_SIZE: Final[int] = _get("THREAD_POOL_SIZE", 16, int)
+
+
+config = Config(
+    TRANSPORT=TRANSPORT,
+    PROVIDER=PROVIDER,
+    RUNTIME_URL=_get("RUNTIME_URL", "http://localhost:8888"),
+    START_NEW_RUNTIME=_get("START_NEW_RUNTIME", "") in _TRUTHY,
+    RUNTIME_ID=_get("RUNTIME_ID"),
+    RUNTIME_TOKEN=_get("RUNTIME_TOKEN"),
+    ROOM_URL=_get("ROOM_URL", "http://localhost:8888"),
+    ROOM_ID=_get("ROOM_ID", "notebook.ipynb"),
+    ROOM_TOKEN=_get("ROOM_TOKEN"),
+)
+
+
+def get_config() -> Config:
+    """Return the current settings. Read once per operation for a consistent view."""
+    return config
+
+
+def set_config(**fields: Any) -> Config:
+    """Swap in a copy of the settings with ``fields`` changed and return it."""
+    global config
+    config = config.replace(**fields)
+    return config
@@ -2,10 +2,12 @@
 #
 # BSD 3-Clause License
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class RoomRuntime(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     provider: str
     room_url: str
     room_id: str
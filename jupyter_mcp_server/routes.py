@@ -9,89 +9,233 @@ This module contains all the custom HTTP endpoints that provide
 administrative and health check functionality for the MCP server.
 """
 
+import asyncio
 import logging
+import time
+from functools import lru_cache
+
+import orjson
 from fastapi import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
+from starlette.routing import BaseRoute, Mount, Route
 from mcp.server import FastMCP
 
 from jupyter_mcp_server.models import RoomRuntime
-import jupyter_mcp_server.config as config
-from jupyter_mcp_server.server import kernel, __start_kernel, __start_notebook_connection
+from jupyter_mcp_server.config import get_config, set_config
 
 logger = logging.getLogger(__name__)
 
+# RoomRuntime fields copied onto the shared config by connect()
+_CONFIG_FIELDS: frozenset[str] = frozenset(
+    ("provider", "runtime_url", "runtime_id", "runtime_token", "room_url", "room_id", "room_token")
+)
+
+# Validated payload of the last successful connect. Compared whole, so a
+# rotated token or a different provider is applied rather than skipped.
+_CURRENT_ROOM_RUNTIME: RoomRuntime | None = None
+
+# Config field names matching _CONFIG_FIELDS, resolved once
+_CONFIG_ATTRS: tuple[tuple[str, str], ...] = tuple(
+    (field, field.upper()) for field in sorted(_CONFIG_FIELDS)
+)
+
+# Health check body, split around the kernel_status value
+_HEALTH_PREFIX = (
+    b'{"success":true,"service":"jupyter-mcp-server",'
+    b'"message":"Jupyter MCP Server is running.","status":"healthy","kernel_status":"'
+)
+_HEALTH_SUFFIX = b'"}'
+# The only kernel_status values ever spliced into the body, pre-encoded
+_KERNEL_STATUS_BYTES: dict[str, bytes] = {
+    status: status.encode("ascii")
+    for status in ("alive", "dead", "not_initialized", "error", "stale", "unknown")
+}
+
+# Kernel status served by /api/healthz, refreshed by refresh_kernel_status()
+# so that probes do not each ping the kernel. A timestamp of 0.0 means the
+# refresher is not running and the status is probed per request instead.
+_KERNEL_STATUS_REFRESH = 5.0
+_KERNEL_STATUS_MAX_AGE = 30.0
+_last_kernel_status = "not_initialized"
+_last_kernel_status_ts = 0.0
+
+# stop() success response, built once; Response objects are safe to resend
+_STOP_OK = Response(content=b'{"success":true}', media_type="application/json")
+
+
+@lru_cache(maxsize=32)
+def _build_room_runtime(payload: tuple) -> RoomRuntime:
+    """Validate a connect payload, reusing the result for repeated payloads."""
+    return RoomRuntime.model_validate(dict(payload))
+
+
+def _matches_config(room_runtime: RoomRuntime) -> bool:
+    """Whether the live config already holds every field of ``room_runtime``.
+
+    Tools switch rooms through set_config, so the remembered payload alone
+    does not say which room the server is on.
+    """
+    cfg = get_config()
+    return all(getattr(room_runtime, field) == getattr(cfg, attr) for field, attr in _CONFIG_ATTRS)
+
+
+def _probe_kernel_status() -> str:
+    """Ask the current kernel whether it is alive. Blocking."""
+    from jupyter_mcp_server import server as _srv
+
+    kernel = _srv.kernel
+    if kernel is None:
+        return "not_initialized"
+    probe = getattr(kernel, '_is_alive', None)
+    try:
+        return "alive" if probe is not None and probe() else "dead"
+    except (AttributeError, OSError):
+        # OSError covers the requests/connection errors raised by the probe
+        return "error"
+
+
+def _record_kernel_status(status: str) -> None:
+    """Update the cached status, if the background refresher maintains one."""
+    global _last_kernel_status, _last_kernel_status_ts
+    if _last_kernel_status_ts:
+        _last_kernel_status, _last_kernel_status_ts = status, time.monotonic()
+
+
+def _run_blocking(fn) -> asyncio.Future:
+    """Run a blocking call on the server's blocking pool without asyncio.to_thread's
+    contextvars copy, which nothing here needs."""
+    from jupyter_mcp_server import server as _srv
+    return asyncio.get_running_loop().run_in_executor(_srv._BLOCKING_POOL, fn)
+
+
+async def refresh_kernel_status(interval: float = _KERNEL_STATUS_REFRESH):
+    """Keep the cached kernel status for /api/healthz up to date. Runs until cancelled."""
+    global _last_kernel_status, _last_kernel_status_ts
+    try:
+        while True:
+            try:
+                status = await _run_blocking(_probe_kernel_status)
+            except Exception as e:
+                logger.warning("Error probing kernel status: %s", e)
+                status = "error"
+            _last_kernel_status, _last_kernel_status_ts = status, time.monotonic()
+            await asyncio.sleep(interval)
+    finally:
+        # Back to probing per request once the refresher is gone
+        _last_kernel_status_ts = 0.0
+
 
 def register_routes(mcp_server: FastMCP):
     """Register all custom routes with the provided FastMCP server instance."""
-    
-    # Administrative routes
-    mcp_server.custom_route("/api/connect", ["PUT"])(connect)
-    mcp_server.custom_route("/api/stop", ["DELETE"])(stop)
-    
-    # Health check route
-    mcp_server.custom_route("/api/healthz", ["GET"])(health_check)
+    # Same list FastMCP.custom_route() appends to, filled in a single call
+    mcp_server._custom_starlette_routes.extend(_CUSTOM_ROUTES)
 
 
 async def connect(request: Request):
     """Connect to a room and a runtime from the Jupyter MCP server."""
 
-    data = await request.json()
-    logger.info("Connecting to room_runtime:", data)
+    data = orjson.loads(await request.body())
+    logger.info("Connecting to room_runtime: %r", data)
+
+    try:
+        room_runtime = _build_room_runtime(tuple(sorted(data.items())))
+    except TypeError:
+        # Unhashable values cannot be cached; validate them directly
+        room_runtime = RoomRuntime.model_validate(data)
 
-    room_runtime = RoomRuntime(**data)
+    # Deferred so that importing this module does not pull in the server stack
+    from jupyter_mcp_server import server as _srv
 
-    global kernel
-    if kernel:
+    global _CURRENT_ROOM_RUNTIME
+    if room_runtime == _CURRENT_ROOM_RUNTIME and _srv.kernel and _matches_config(room_runtime):
+        probe = getattr(_srv.kernel, '_is_alive', None)
         try:
-            kernel.stop()
+            # The liveness probe is a blocking REST call
+            if probe and await _run_blocking(probe):
+                return JSONResponse({"success": True, "cached": True})
         except Exception as e:
-            logger.warning(f"Error stopping kernel during connect: {e}")
+            logger.warning("Error probing kernel during connect: %s", e)
+    _CURRENT_ROOM_RUNTIME = None
+
+    if _srv.kernel:
+        try:
+            await _run_blocking(_srv.kernel.stop)
+        except Exception as e:
+            logger.warning("Error stopping kernel during connect: %s", e)
+        # Already stopped here, so __start_kernel() must not stop it again
+        _srv.kernel = None
+        _record_kernel_status("not_initialized")
 
     # Update configuration
-    config.PROVIDER = room_runtime.provider
-    config.RUNTIME_URL = room_runtime.runtime_url
-    config.RUNTIME_ID = room_runtime.runtime_id
-    config.RUNTIME_TOKEN = room_runtime.runtime_token
-    config.ROOM_URL = room_runtime.room_url
-    config.ROOM_ID = room_runtime.room_id
-    config.ROOM_TOKEN = room_runtime.room_token
+    set_config(**room_runtime.model_dump(include=_CONFIG_FIELDS))
 
     try:
-        __start_kernel()
-        await __start_notebook_connection()
+        # Independent round-trips: start the kernel off the loop while the
+        # room's websocket URL is resolved and the notebook synced
+        await asyncio.gather(_run_blocking(_srv.__start_kernel), _srv.__reconnect_notebook())
+        _CURRENT_ROOM_RUNTIME = room_runtime
+        _record_kernel_status("alive")
         return JSONResponse({"success": True})
     except Exception as e:
-        logger.error(f"Failed to connect: {e}")
+        logger.error("Failed to connect: %s", e)
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 
 async def stop(request: Request):
-    global kernel
+    from jupyter_mcp_server import server as _srv
+
     try:
-        if kernel:
-            await kernel.stop()
-        return JSONResponse({"success": True})
+        if _srv.kernel:
+            await _run_blocking(_srv.kernel.stop)
+            _srv.kernel = None
+            _record_kernel_status("not_initialized")
+        return _STOP_OK
     except Exception as e:
-        logger.error(f"Error stopping kernel: {e}")
+        logger.error("Error stopping kernel: %s", e)
+        return Response(
+            content=orjson.dumps({"success": False, "error": str(e)}),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+async def disconnect(request: Request):
+    """Close the shared notebook connection; the next tool call reopens it."""
+    from jupyter_mcp_server import server as _srv
+
+    try:
+        closed = await _srv.__close_notebook_connection()
+        return JSONResponse({"success": True, "disconnected": closed})
+    except Exception as e:
+        logger.error("Error closing notebook connection: %s", e)
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 
 async def health_check(request: Request):
     """Custom health check endpoint"""
-    kernel_status = "unknown"
-    try:
-        if kernel:
-            kernel_status = "alive" if hasattr(kernel, 'is_alive') and kernel.is_alive() else "dead"
-        else:
-            kernel_status = "not_initialized"
-    except Exception:
-        kernel_status = "error"
-    return JSONResponse(
-        {
-            "success": True,
-            "service": "jupyter-mcp-server",
-            "message": "Jupyter MCP Server is running.",
-            "status": "healthy",
-            "kernel_status": kernel_status,
-        }
-    )
\ No newline at end of file
+    if not _last_kernel_status_ts:
+        kernel_status = _probe_kernel_status()
+    elif time.monotonic() - _last_kernel_status_ts > _KERNEL_STATUS_MAX_AGE:
+        # The refresher is stuck, e.g. on a hanging liveness probe
+        kernel_status = "stale"
+    else:
+        kernel_status = _last_kernel_status
+    return Response(
+        content=_HEALTH_PREFIX + _KERNEL_STATUS_BYTES.get(kernel_status, b"unknown") + _HEALTH_SUFFIX,
+        media_type="application/json",
+    )
+
+# Route table, built once at import; /api paths resolve through one Mount
+_CUSTOM_ROUTES: tuple[BaseRoute, ...] = (
+    Mount(
+        "/api",
+        routes=[
+            # Administrative routes
+            Route("/connect", connect, methods=["PUT"]),
+            Route("/stop", stop, methods=["DELETE"]),
+            Route("/disconnect", disconnect, methods=["DELETE"]),
+            # Health check route
+            Route("/healthz", health_check, methods=["GET"]),
+        ],
+    ),
+)
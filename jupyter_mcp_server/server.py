@@ -5,14 +5,22 @@
 # Heavily Modified by syntactiq.ai
 
 import asyncio
+import atexit
+import contextlib
+import functools
+import importlib.util
 import logging
+import random
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Union, Dict, Any
-from concurrent.futures import ThreadPoolExecutor
 
 import click
 import httpx
+import orjson
 import uvicorn
 # Note: Request import moved to routes.py
 from jupyter_kernel_client import KernelClient
@@ -24,62 +32,216 @@ from mcp.server import FastMCP
 from starlette.applications import Starlette
 from starlette.middleware.cors import CORSMiddleware
 
-from jupyter_mcp_server import config
-from jupyter_mcp_server.config import (
-    TRANSPORT, PROVIDER, RUNTIME_URL, START_NEW_RUNTIME, RUNTIME_ID, RUNTIME_TOKEN
-)
+from jupyter_mcp_server.config import KERNEL_POOL, THREAD_POOL_SIZE, Config, get_config, set_config
+from jupyter_mcp_server.models import RoomRuntime
 
 # Global variables for kernel and notebook connection
 kernel = None
 notebook_connection = None
 
+# Bumped on every kernel start and room switch; anything remembered about
+# earlier executions is stale once this moves on
+_kernel_generation = 0
+
+# Serialises kernel (re)starts, which run on pool threads from connect and
+# from every tool's liveness check, so a dead kernel is replaced only once
+_kernel_lock = threading.Lock()
+
+# Kernel capabilities, probed once per kernel in __start_kernel()
+_KERNEL_HAS_INTERRUPT = False
+_KERNEL_HAS_IS_ALIVE = False
+
+# Pre-started kernels waiting to replace the active one, with the runtime
+# (URL, token) each was started against. Only used for new kernels: a
+# configured RUNTIME_ID always attaches to that kernel.
+_spare_kernels: list[tuple[tuple, KernelClient]] = []
+_spare_lock = threading.Lock()
+_spare_filling = False
+
+# Worker threads for notebook.execute_cell. Cells can block for minutes, so
+# they get their own pool rather than tying up the one below
+_EXEC_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jmcp-exec")
+atexit.register(_EXEC_POOL.shutdown, wait=False)
+
+# Cell executions submitted by this process whose worker thread has not yet
+# returned. Unlike the kernel model's execution_state, which is only as fresh
+# as the last REST refresh, this is always current.
+_executions_running = 0
+_executions_idle = asyncio.Event()
+_executions_idle.set()
+
+# Worker threads for the short blocking REST calls, sized by THREAD_POOL_SIZE
+# instead of the loop default of min(32, cpu_count + 4)
+_BLOCKING_POOL = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="jmcp")
+atexit.register(_BLOCKING_POOL.shutdown, wait=False)
+
+# Serialises (re)connection so concurrent tools share one NbModelClient
+_nb_lock = asyncio.Lock()
+
+# Room the shared NbModelClient was opened for; a config change elsewhere
+# makes it stale even while its websocket is healthy
+_notebook_room: tuple | None = None
+
+# Websocket URL per room. Resolving one is a blocking REST round-trip that
+# opens a collaboration session, so it is reused until a connection drops.
+# Bounded like an lru_cache since switch_notebook adds a room per notebook
+_ws_urls: dict[tuple, str] = {}
+_WS_URLS_MAX = 8
+
+# Shared client for Jupyter REST calls (contents, sessions, workspaces),
+# created on first use so keep-alive connections are reused across tools
+_http_client: httpx.AsyncClient | None = None
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# HTTP/2 needs the optional h2 package and is only negotiated over TLS,
+# e.g. with a hub behind an HTTPS proxy; plain Jupyter stays on HTTP/1.1
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Errors that mean the notebook websocket went away: checked by type, then
+# by class name (tornado/websockets), and only then by message
+_CONN_ERR_TYPES = (ConnectionResetError, ConnectionAbortedError, ConnectionRefusedError)
+_CONN_ERR_NAMES = frozenset({"WebSocketClosedError", "ConnectionClosed", "ConnectionClosedError", "ConnectionClosedOK"})
+_CONN_ERR_RE = re.compile(r"websocketclosederror|connection (?:is already )?closed", re.I)
+
 logger = logging.getLogger(__name__)
 
 # Connection management functions merged from connections.py
 
 def __start_kernel():
     """Start the Jupyter kernel with error handling."""
-    global kernel
+    with _kernel_lock:
+        __start_kernel_locked()
+
+def __start_kernel_locked():
+    """Body of __start_kernel; the caller holds _kernel_lock."""
+    global kernel, _KERNEL_HAS_INTERRUPT, _KERNEL_HAS_IS_ALIVE, _kernel_generation
+    _kernel_generation += 1
     try:
         if kernel:
             kernel.stop()
     except Exception as e:
-        logger.warning(f"Error stopping existing kernel: {e}")
+        logger.warning("Error stopping existing kernel: %s", e)
     
     try:
         # Initialize the kernel client with the provided parameters.
-        kernel = KernelClient(server_url=config.RUNTIME_URL, token=config.RUNTIME_TOKEN, kernel_id=config.RUNTIME_ID)
-        kernel.start()
+        cfg = get_config()
+        kernel = __take_spare_kernel(cfg) if not cfg.RUNTIME_ID else None
+        if kernel is None:
+            kernel = KernelClient(server_url=cfg.RUNTIME_URL, token=cfg.RUNTIME_TOKEN, kernel_id=cfg.RUNTIME_ID)
+            kernel.start()
+        # Resolve the liveness probe once so health checks skip the hasattr lookup
+        kernel._is_alive = getattr(kernel, 'is_alive', None)
+        _KERNEL_HAS_INTERRUPT = hasattr(kernel, 'interrupt')
+        _KERNEL_HAS_IS_ALIVE = kernel._is_alive is not None
         logger.info("Kernel started successfully")
     except Exception as e:
         logger.error(f"Failed to start kernel: {e}")
         kernel = None
         raise
+    if KERNEL_POOL and not cfg.RUNTIME_ID:
+        __schedule_spare_fill()
+
+def __take_spare_kernel(cfg):
+    """Pop a warm kernel started against the current runtime, if any.
+
+    Spares left over from another runtime are stopped instead.
+    """
+    runtime = (cfg.RUNTIME_URL, cfg.RUNTIME_TOKEN)
+    with _spare_lock:
+        stale = [k for r, k in _spare_kernels if r != runtime]
+        _spare_kernels[:] = [(r, k) for r, k in _spare_kernels if r == runtime]
+        spare = _spare_kernels.pop(0)[1] if _spare_kernels else None
+    for k in stale:
+        try:
+            k.stop()
+        except Exception as e:
+            logger.warning("Error stopping spare kernel: %s", e)
+    if spare is not None:
+        logger.info("Using pre-started spare kernel")
+    return spare
+
+def __fill_spare_kernels():
+    """Start kernels until KERNEL_POOL spares are waiting. Runs on a thread."""
+    global _spare_filling
+    try:
+        while True:
+            cfg = get_config()
+            with _spare_lock:
+                if len(_spare_kernels) >= KERNEL_POOL:
+                    _spare_filling = False
+                    return
+            spare = KernelClient(server_url=cfg.RUNTIME_URL, token=cfg.RUNTIME_TOKEN)
+            spare.start()
+            with _spare_lock:
+                _spare_kernels.append(((cfg.RUNTIME_URL, cfg.RUNTIME_TOKEN), spare))
+            logger.info("Spare kernel ready")
+    except Exception as e:
+        logger.warning("Could not pre-start spare kernel: %s", e)
+        with _spare_lock:
+            _spare_filling = False
+
+def __schedule_spare_fill():
+    """Top up the spare kernels in the background, once at a time."""
+    global _spare_filling
+    with _spare_lock:
+        if _spare_filling:
+            return
+        _spare_filling = True
+    threading.Thread(target=__fill_spare_kernels, name="kernel-pool", daemon=True).start()
+
+@atexit.register
+def _stop_spare_kernels():
+    """Shut down spare kernels so they do not linger on the Jupyter server."""
+    with _spare_lock:
+        spares, _spare_kernels[:] = [k for _, k in _spare_kernels], []
+    for k in spares:
+        try:
+            k.stop()
+        except Exception:
+            pass
+
+def __room_key(cfg) -> tuple:
+    """Settings that identify which notebook a connection is serving."""
+    return (cfg.ROOM_URL, cfg.ROOM_ID, cfg.ROOM_TOKEN, cfg.PROVIDER)
 
 async def __start_notebook_connection():
     """Establish a persistent connection to the notebook."""
-    global notebook_connection
+    global notebook_connection, _notebook_room
     try:
         if notebook_connection:
             logger.info("Stopping existing notebook connection...")
             await notebook_connection.stop()
     except Exception as e:
-        logger.warning(f"Error stopping existing notebook connection: {e}")
+        logger.warning("Error stopping existing notebook connection: %s", e)
     
+    cfg = get_config()
+    room = __room_key(cfg)
     try:
-        logger.info(f"Establishing notebook connection to {config.ROOM_URL} for {config.ROOM_ID}")
+        logger.info(f"Establishing notebook connection to {cfg.ROOM_URL} for {cfg.ROOM_ID}")
         # Initialize the persistent notebook connection using WebSocket URL
-        websocket_url = get_notebook_websocket_url(
-            server_url=config.ROOM_URL, 
-            token=config.ROOM_TOKEN, 
-            path=config.ROOM_ID, 
-            provider=PROVIDER
-        )
+        websocket_url = _ws_urls.get(room)
+        if websocket_url is None:
+            websocket_url = await __submit_blocking(
+                functools.partial(
+                    get_notebook_websocket_url,
+                    server_url=cfg.ROOM_URL, 
+                    token=cfg.ROOM_TOKEN, 
+                    path=cfg.ROOM_ID, 
+                    provider=cfg.PROVIDER
+                )
+            )
+            if len(_ws_urls) >= _WS_URLS_MAX:
+                del _ws_urls[next(iter(_ws_urls))]
+            _ws_urls[room] = websocket_url
+        else:
+            # Mark as most recently used
+            _ws_urls[room] = _ws_urls.pop(room)
         logger.info(f"WebSocket URL: {websocket_url}")
         
         notebook_connection = NbModelClient(websocket_url)
+        _notebook_room = room
         await notebook_connection.start()
-        logger.info(f"Persistent notebook connection established for: {config.ROOM_ID}")
+        logger.info(f"Persistent notebook connection established for: {cfg.ROOM_ID}")
         
         # Verify the connection immediately
         if hasattr(notebook_connection, '_doc'):
@@ -98,6 +260,7 @@ async def __start_notebook_connection():
     except Exception as e:
         logger.error(f"Failed to start notebook connection: {e}")
         notebook_connection = None
+        _ws_urls.pop(room, None)
         raise
 
 async def __ensure_notebook_connection():
@@ -133,13 +296,25 @@ async def __ensure_notebook_connection():
         # Test that document has cells attribute
         len(ydoc._ycells) if hasattr(ydoc, '_ycells') else 0
         
+        # The websocket is kept alive by the websockets library's pings (every
+        # 20s, 20s pong timeout), well inside common proxy idle limits. When a
+        # pong is missed the client's run task ends and the model is unsynced,
+        # while the Y-doc itself stays around, so check the sync state too.
+        if not getattr(notebook_connection, 'synced', True):
+            raise Exception("Websocket closed (keepalive ping timed out or server went away)")
+        
+        if _notebook_room != __room_key(get_config()):
+            raise Exception("Room configuration changed")
+        
         # Connection seems alive
         logger.debug("Existing notebook connection verified as active")
         return
         
     except Exception as e:
-        logger.warning(f"Notebook connection lost ({e}), re-establishing...")
-        notebook_connection = None  # Reset to None before retrying
+        logger.warning("Notebook connection lost (%s), re-establishing...", e)
+        # The session behind a dropped websocket may be gone; resolve afresh
+        _ws_urls.pop(_notebook_room, None)
+        # __start_notebook_connection() stops the stale client before replacing it
         await __start_notebook_connection()
         
         # Verify the new connection
@@ -155,160 +330,418 @@ async def __ensure_notebook_connection():
         
         logger.info("Notebook connection re-established and verified")
 
-async def __ensure_kernel_alive():
-    """Ensure kernel is alive, restart if needed."""
-    global kernel
-    
+async def __get_notebook():
+    """Return the shared notebook connection, establishing it if needed."""
+    async with _nb_lock:
+        await __ensure_notebook_connection()
+        return notebook_connection
+
+async def __reconnect_notebook():
+    """Replace the shared notebook connection, e.g. after ROOM_ID changed."""
+    async with _nb_lock:
+        await __start_notebook_connection()
+
+async def __switch_room(room_id: str) -> Config:
+    """Point the server at another notebook and reconnect to it.
+
+    The config swap and reconnect happen under the connection lock, so a
+    concurrent tool waiting in ``__get_notebook`` sees either the old room
+    with its client or the new room with its client, never a mix.
+    """
+    global _kernel_generation
+    async with _nb_lock:
+        cfg = set_config(room_id=room_id)
+        _kernel_generation += 1
+        await __start_notebook_connection()
+    return cfg
+
+async def __close_notebook_connection() -> bool:
+    """Close the shared notebook connection. Returns False if none was open."""
+    global notebook_connection
+    async with _nb_lock:
+        if notebook_connection is None:
+            return False
+        connection, notebook_connection = notebook_connection, None
+    try:
+        await connection.stop()
+    except Exception as e:
+        logger.warning("Error stopping notebook connection: %s", e)
+    return True
+
+async def __retire_notebook(expected=None):
+    """Drop the shared notebook client after a connection error and stop it.
+
+    With ``expected``, only that client is retired, so a fresh one opened
+    meanwhile by a concurrent tool is left alone.
+    """
+    global notebook_connection
+    async with _nb_lock:
+        connection = notebook_connection
+        if connection is None or (expected is not None and connection is not expected):
+            return
+        notebook_connection = None
+    try:
+        await connection.stop()
+    except Exception as e:
+        logger.debug("Error stopping dead notebook connection: %s", e)
+
+@contextlib.asynccontextmanager
+async def __http_client():
+    """Yield the shared httpx.AsyncClient. Unlike ``httpx.AsyncClient()``
+    used as a context manager, leaving the block keeps it open."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=_HTTP2)
+    yield _http_client
+
+async def _close_http_client():
+    """Close the shared HTTP client, if one was created."""
+    global _http_client
+    client, _http_client = _http_client, None
+    if client is not None:
+        await client.aclose()
+
+async def _close_connections():
+    """Stop the shared notebook client and close the HTTP client on shutdown."""
+    await __close_notebook_connection()
+    await _close_http_client()
+
+def __check_kernel_alive():
+    """Blocking half of __ensure_kernel_alive: probe, and restart if needed."""
     # Check if kernel exists and is alive
-    if kernel and hasattr(kernel, 'is_alive') and kernel.is_alive():
+    if kernel and _KERNEL_HAS_IS_ALIVE and kernel.is_alive():
         return
-    
-    logger.info("Kernel is None or not alive, starting new kernel")
-    __start_kernel()
+
+    with _kernel_lock:
+        # A concurrent tool or connect may have restarted it while we waited
+        if kernel and _KERNEL_HAS_IS_ALIVE and kernel.is_alive():
+            return
+        logger.info("Kernel is None or not alive, starting new kernel")
+        __start_kernel_locked()
+
+async def __ensure_kernel_alive():
+    """Ensure kernel is alive, restart if needed.
+
+    The probe and any restart are REST round-trips, so they run on the
+    executor and can overlap with notebook I/O on the event loop.
+    """
+    await __submit_blocking(__check_kernel_alive)
+
+def __submit_blocking(fn, *args) -> asyncio.Future:
+    """Run a blocking call on the shared blocking pool.
+
+    Unlike asyncio.to_thread this skips copying the contextvars context,
+    which nothing in this server relies on.
+    """
+    return asyncio.get_running_loop().run_in_executor(_BLOCKING_POOL, fn, *args)
+
+def __submit_execution(notebook, cell_index: int, kernel) -> asyncio.Future:
+    """Run notebook.execute_cell on the dedicated execution pool."""
+    global _executions_running
+    loop = asyncio.get_running_loop()
+    future = _EXEC_POOL.submit(notebook.execute_cell, cell_index, kernel)
+    _executions_running += 1
+    _executions_idle.clear()
+
+    def _on_done(_):
+        # Fires when the thread returns, even if the awaiting side was cancelled
+        try:
+            loop.call_soon_threadsafe(__execution_finished)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    future.add_done_callback(_on_done)
+    return asyncio.wrap_future(future, loop=loop)
+
+def __execution_finished():
+    global _executions_running
+    _executions_running -= 1
+    if not _executions_running:
+        _executions_idle.set()
+
+async def __drain_execution(execution_task, grace_seconds: float = 5.0) -> None:
+    """Give an interrupted execution's worker thread time to return.
+
+    Cancelling the future does not stop the thread, which would keep
+    writing to the shared notebook after the tool call has moved on.
+    """
+    done, _ = await asyncio.wait({execution_task}, timeout=grace_seconds)
+    if not done:
+        logger.warning("Cell execution still running %.0fs after interrupt", grace_seconds)
+    elif not execution_task.cancelled() and execution_task.exception() is not None:
+        logger.debug("Interrupted execution ended with: %s", execution_task.exception())
 
 # Alternative approach: Create a custom execution function that forces updates
 async def __execute_cell_and_wait_for_completion(notebook, cell_index, kernel, timeout_seconds=300) -> bool:
     """Execute cell and wait for actual completion with proper synchronization."""
-    start_time = time.time()
+    start_time = time.monotonic()
     
     try:
         # Execute cell in thread and wait for actual completion
-        execution_task = asyncio.create_task(
-            asyncio.to_thread(notebook.execute_cell, cell_index, kernel)
+        execution_task = asyncio.ensure_future(
+            __submit_execution(notebook, cell_index, kernel)
         )
         
-        # Wait for execution to complete with timeout
-        await asyncio.wait_for(execution_task, timeout=timeout_seconds)
+        # Wait for execution to complete with timeout; shielded so a timeout
+        # leaves the task to be drained below instead of orphaning the thread
+        await asyncio.wait_for(asyncio.shield(execution_task), timeout=timeout_seconds)
         
         # Execution completed successfully
-        elapsed = time.time() - start_time
-        logger.info(f"Cell {cell_index} execution completed successfully in {elapsed:.2f}s")
+        elapsed = time.monotonic() - start_time
+        logger.info("Cell %s execution completed successfully in %.2fs", cell_index, elapsed)
         return True
         
     except asyncio.TimeoutError:
-        # Cancel execution and interrupt kernel
-        execution_task.cancel()
+        # Interrupt the kernel and let the execution thread return
         try:
-            if hasattr(kernel, 'interrupt'):
+            if _KERNEL_HAS_INTERRUPT:
                 kernel.interrupt()
-                logger.info(f"Interrupted kernel after {timeout_seconds}s timeout")
+                logger.info("Interrupted kernel after %ss timeout", timeout_seconds)
         except Exception as interrupt_err:
-            logger.warning(f"Failed to interrupt kernel: {interrupt_err}")
+            logger.warning("Failed to interrupt kernel: %s", interrupt_err)
+        await __drain_execution(execution_task)
         
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         raise asyncio.TimeoutError(f"Cell {cell_index} execution timed out after {elapsed:.1f}s")
         
     except Exception as e:
-        elapsed = time.time() - start_time
-        logger.error(f"Cell {cell_index} execution failed after {elapsed:.2f}s: {e}")
+        elapsed = time.monotonic() - start_time
+        logger.error("Cell %s execution failed after %.2fs: %s", cell_index, elapsed, e)
         raise
 
+async def __wait_for_ydoc(notebook, predicate, max_wait_seconds: float) -> bool:
+    """Wait until predicate(ycells) holds, re-checking whenever the Y-doc changes.
+
+    Falls back to brief polling when the cells array cannot be observed.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    # Writers hold the client's lock while updating the doc
+    doc_lock = getattr(notebook, '_lock', None) or contextlib.nullcontext()
+    ycells = notebook._doc._ycells
+    subscription = None
+    if hasattr(ycells, 'observe_deep'):
+        # Updates may be applied from the execution thread
+        subscription = ycells.observe_deep(lambda events: loop.call_soon_threadsafe(changed.set))
+    deadline = loop.time() + max_wait_seconds
+
+    try:
+        while True:
+            # Clear before checking so changes made meanwhile wake us again
+            changed.clear()
+            try:
+                with doc_lock:
+                    if predicate(ycells):
+                        return True
+            except Exception:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            if subscription is None:
+                remaining = min(remaining, 0.1)  # Brief polling interval
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if subscription is not None:
+            try:
+                ycells.unobserve(subscription)
+            except Exception as e:
+                logger.debug("Could not unobserve notebook cells: %s", e)
+
 async def __wait_for_execution_outputs(notebook, cell_index: int, max_wait_seconds: int = 5) -> bool:
     """Wait for execution outputs to be available in the notebook after execution completes."""
-    start_time = time.time()
-    
-    while time.time() - start_time < max_wait_seconds:
-        try:
-            ydoc = notebook._doc
-            if cell_index < len(ydoc._ycells):
-                cell = ydoc._ycells[cell_index]
-                outputs = cell.get("outputs", [])
-                
-                # Check if outputs are available (even if empty, execution should set this)
-                if outputs is not None:
-                    return True
-        except Exception:
-            pass
-        
-        await asyncio.sleep(0.1)  # Brief polling for output availability
-    
+    def outputs_available(ycells) -> bool:
+        # Even empty outputs count, execution should set this
+        return cell_index < len(ycells) and ycells[cell_index].get("outputs", []) is not None
+
+    if await __wait_for_ydoc(notebook, outputs_available, max_wait_seconds):
+        return True
+
     # Even if no outputs, execution may have completed
-    logger.warning(f"Outputs not immediately available for cell {cell_index}, proceeding anyway")
+    logger.warning("Outputs not immediately available for cell %s, proceeding anyway", cell_index)
     return True
 
 def __is_kernel_busy(kernel):
-    """Check if kernel is currently executing something."""
-    try:
-        # This is a simple check - you might need to adapt based on your kernel client
-        if hasattr(kernel, '_client') and hasattr(kernel._client, 'is_alive'):
-            return kernel._client.is_alive()
-        return False
-    except Exception:
-        return False
+    """Check if kernel is currently executing something.
+
+    Reads the kernel model's execution_state, which KernelClient only
+    updates on a REST refresh such as the one done by is_alive().
+    """
+    return getattr(kernel, 'execution_state', None) == "busy"
+
+async def __is_kernel_busy_now(kernel) -> bool:
+    """Refresh the kernel model, then check whether it is busy.
+
+    Used once an IOPub subscription is in place: the refreshed state is
+    current as of a moment after subscribing, so a kernel reported busy
+    here will still announce its next idle status to the subscriber.
+    """
+    if _KERNEL_HAS_IS_ALIVE:
+        try:
+            await __submit_blocking(kernel.is_alive)
+        except Exception as e:
+            logger.warning("Could not refresh kernel state: %s", e)
+    return __is_kernel_busy(kernel)
+
+def __is_idle_status(msg) -> bool:
+    """Whether an IOPub message reports the kernel going idle."""
+    return isinstance(msg, dict) and msg.get("content", {}).get("execution_state") == "idle"
 
 async def __wait_for_kernel_idle(kernel, max_wait_seconds=60):
-    """Wait for kernel to become idle before proceeding."""
-    start_time = time.time()
+    """Wait for kernel to become idle before proceeding.
+
+    Awaits the kernel's next idle status message when the client exposes
+    its IOPub stream, either as an async iterator or as a msg_ready signal.
+    Only clients with neither hook are polled. In each case the subscription
+    is set up before the kernel state is refreshed and checked, so an idle
+    message cannot slip past. jupyter_kernel_client 0.7.3 exposes neither
+    hook; the event branches serve later client versions.
+
+    Executions this process started itself are waited for directly, without
+    asking the kernel, so back-to-back tool calls need no round-trip.
+    """
+    if _executions_running:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(_executions_idle.wait(), timeout=max_wait_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Kernel still busy after %ss, proceeding anyway", max_wait_seconds)
+            return
+        max_wait_seconds = max(0.0, max_wait_seconds - (time.monotonic() - started))
+
+    # Async iterator over IOPub messages
+    iopub_messages = getattr(kernel, 'iopub_messages', None)
+    if iopub_messages is not None:
+        messages = iopub_messages()
+
+        async def _next_idle():
+            async for msg in messages:
+                if __is_idle_status(msg):
+                    return
+
+        try:
+            if await __is_kernel_busy_now(kernel):
+                await asyncio.wait_for(_next_idle(), timeout=max_wait_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Kernel still busy after %ss, proceeding anyway", max_wait_seconds)
+        finally:
+            if hasattr(messages, 'aclose'):
+                await messages.aclose()
+        return
+
+    # Signal fired from the client's IOPub thread
+    channel = getattr(getattr(kernel, '_client', None), 'iopub_channel', None)
+    msg_ready = getattr(channel, 'msg_ready', None)
+    if msg_ready is not None and hasattr(msg_ready, 'connect'):
+        loop = asyncio.get_running_loop()
+        idle = asyncio.Event()
+
+        def _on_message(msg):
+            if __is_idle_status(msg):
+                loop.call_soon_threadsafe(idle.set)
+
+        msg_ready.connect(_on_message)
+        try:
+            if await __is_kernel_busy_now(kernel):
+                await asyncio.wait_for(idle.wait(), timeout=max_wait_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Kernel still busy after %ss, proceeding anyway", max_wait_seconds)
+        finally:
+            msg_ready.disconnect(_on_message)
+        return
+
+    # No status hook available: poll
+    start_time = time.monotonic()
     while __is_kernel_busy(kernel):
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         if elapsed > max_wait_seconds:
-            logger.warning(f"Kernel still busy after {max_wait_seconds}s, proceeding anyway")
+            logger.warning("Kernel still busy after %ss, proceeding anyway", max_wait_seconds)
             break
-        logger.info(f"Waiting for kernel to become idle... ({elapsed:.1f}s)")
+        logger.debug("Waiting for kernel to become idle... (%.1fs)", elapsed)
         await asyncio.sleep(1)
+        # Refresh the kernel model so execution_state moves on
+        if _KERNEL_HAS_IS_ALIVE:
+            try:
+                await __submit_blocking(kernel.is_alive)
+            except Exception as e:
+                logger.warning("Could not refresh kernel state: %s", e)
+                break
 
-async def __safe_notebook_operation(operation_func, max_retries=3):
-    """Safely execute notebook operations with connection recovery."""
+def __is_connection_error(e: BaseException) -> bool:
+    """Whether an exception means the notebook connection was lost."""
+    if isinstance(e, _CONN_ERR_TYPES) or type(e).__name__ in _CONN_ERR_NAMES:
+        return True
+    return _CONN_ERR_RE.search(str(e)) is not None
+
+async def __safe_notebook_operation(operation_func, *args, max_retries=4, **kwargs):
+    """Safely execute operation_func(*args, **kwargs) with connection recovery.
+
+    Connection errors are retried with exponential back-off plus jitter
+    (0.25s, 0.5s, 1s, ... capped at 4s), so a quick recovery is picked up
+    fast and reconnecting clients do not retry in lockstep.
+
+    Tools borrow the pooled client through __get_notebook() and never
+    release it; this wrapper is the one place a broken client is retired.
+    """
     for attempt in range(max_retries):
+        borrowed = notebook_connection
         try:
-            return await operation_func()
+            return await operation_func(*args, **kwargs)
         except Exception as e:
-            error_msg = str(e).lower()
-            if any(err in error_msg for err in ["websocketclosederror", "connection is already closed", "connection closed"]):
+            if __is_connection_error(e):
+                # The client's Y-doc outlives its websocket, so drop it here;
+                # otherwise the retry would reuse the dead connection
+                await __retire_notebook(borrowed)
                 if attempt < max_retries - 1:
-                    logger.warning(f"Connection lost, retrying... (attempt {attempt + 1}/{max_retries})")
-                    await asyncio.sleep(1 + attempt)  # Increasing delay
+                    logger.warning("Connection lost, retrying... (attempt %s/%s)", attempt + 1, max_retries)
+                    delay = min(4.0, 0.25 * (2 ** attempt)) + random.uniform(0, 0.25)
+                    await asyncio.sleep(delay)
                     continue
                 else:
                     logger.error(f"Failed after {max_retries} attempts: {e}")
-                    raise Exception(f"Connection failed after {max_retries} retries: {e}")
+                    raise Exception(f"Connection failed after {max_retries} retries: {e}") from e
             else:
                 # Non-connection error, don't retry
-                raise e
+                raise
     
     raise Exception("Unexpected error in retry logic")
 
+async def __call_with_notebook(operation_func, *args, **kwargs):
+    return await operation_func(await __get_notebook(), *args, **kwargs)
+
+async def __with_notebook(operation_func, *args, max_retries=4, **kwargs):
+    """Run operation_func(notebook, *args, **kwargs) on the shared notebook client.
+
+    Fetches the client on every attempt, so a retry after a connection
+    error gets the fresh one __safe_notebook_operation left behind.
+    """
+    return await __safe_notebook_operation(
+        __call_with_notebook, operation_func, *args, max_retries=max_retries, **kwargs
+    )
+
 async def __wait_for_cell_count_change(notebook, expected_count: int, max_wait_seconds: int = 10) -> bool:
     """Wait for notebook cell count to reach expected value with proper synchronization."""
-    start_time = time.time()
-    
-    while time.time() - start_time < max_wait_seconds:
-        try:
-            ydoc = notebook._doc
-            current_count = len(ydoc._ycells)
-            if current_count == expected_count:
-                return True
-        except Exception:
-            pass
-        await asyncio.sleep(0.1)  # Brief polling interval
-    
-    return False
+    return await __wait_for_ydoc(notebook, lambda ycells: len(ycells) == expected_count, max_wait_seconds)
 
 async def __wait_for_cell_content_change(notebook, cell_index: int, expected_content: str, max_wait_seconds: int = 10) -> bool:
     """Wait for specific cell content to be updated with proper synchronization."""
-    start_time = time.time()
     expected_content = expected_content.strip()
-    
-    while time.time() - start_time < max_wait_seconds:
-        try:
-            ydoc = notebook._doc
-            if cell_index < len(ydoc._ycells):
-                cell = ydoc._ycells[cell_index]
-                current_source = cell.get("source", "")
-                if isinstance(current_source, list):
-                    current_source = ''.join(current_source)
-                current_source = str(current_source).strip()
-                
-                if expected_content in current_source:
-                    return True
-        except Exception:
-            pass
-        await asyncio.sleep(0.1)  # Brief polling interval
-    
-    return False
+
+    def content_updated(ycells) -> bool:
+        if cell_index >= len(ycells):
+            return False
+        current_source = ycells[cell_index].get("source", "")
+        if isinstance(current_source, list):
+            current_source = ''.join(current_source)
+        return expected_content in str(current_source).strip()
+
+    return await __wait_for_ydoc(notebook, content_updated, max_wait_seconds)
 
 from jupyter_mcp_server.tools import register_tools
-from jupyter_mcp_server.routes import register_routes
+from jupyter_mcp_server.routes import register_routes, refresh_kernel_status
 
 ###############################################################################
 
@@ -319,6 +752,21 @@ class FastMCPWithCORS(FastMCP):
         """
         # Get the original Starlette app
         app = super().streamable_http_app()
+
+        # Run the /api/healthz kernel status refresher for the app's lifetime
+        inner_lifespan = app.router.lifespan_context
+
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            refresher = asyncio.create_task(refresh_kernel_status())
+            try:
+                async with inner_lifespan(app) as state:
+                    yield state
+            finally:
+                refresher.cancel()
+                await _close_connections()
+
+        app.router.lifespan_context = lifespan
         
         # Add CORS middleware
         app.add_middleware(
@@ -352,6 +800,14 @@ mcp = FastMCPWithCORS(name="Jupyter MCP Server", json_response=False, stateless_
 register_tools(mcp)
 register_routes(mcp)
 
+@functools.cache
+def _cli_client() -> httpx.Client:
+    """Keep-alive client for the CLI's control requests, closed at exit."""
+    client = httpx.Client(timeout=10.0)
+    atexit.register(client.close)
+    return client
+
+
 @click.group()
 def server():
     """Manages Jupyter MCP Server."""
@@ -427,34 +883,33 @@ def connect_command(
 ):
     """Command to connect a Jupyter MCP Server to a room and a runtime."""
 
-    global PROVIDER
-    PROVIDER = provider
-
-    config.RUNTIME_URL = runtime_url
-    config.RUNTIME_ID = runtime_id
-    config.RUNTIME_TOKEN = runtime_token
-
-    config.ROOM_URL = room_url
-    config.ROOM_ID = room_id
-    config.ROOM_TOKEN = room_token
+    cfg = set_config(
+        provider=provider,
+        runtime_url=runtime_url,
+        runtime_id=runtime_id,
+        runtime_token=runtime_token,
+        room_url=room_url,
+        room_id=room_id,
+        room_token=room_token,
+    )
 
     room_runtime = RoomRuntime(
-        provider=PROVIDER,
-        runtime_url=RUNTIME_URL,
-        runtime_id=RUNTIME_ID,
-        runtime_token=RUNTIME_TOKEN,
-        room_url=config.ROOM_URL,
-        room_id=config.ROOM_ID,
-        room_token=config.ROOM_TOKEN,
+        provider=cfg.PROVIDER,
+        runtime_url=cfg.RUNTIME_URL,
+        runtime_id=cfg.RUNTIME_ID,
+        runtime_token=cfg.RUNTIME_TOKEN,
+        room_url=cfg.ROOM_URL,
+        room_id=cfg.ROOM_ID,
+        room_token=cfg.ROOM_TOKEN,
     )
 
-    r = httpx.put(
+    r = _cli_client().put(
         f"{jupyter_mcp_server_url}/api/connect",
         headers={
             "Content-Type": "application/json",
             "Accept": "application/json",
         },
-        content=room_runtime.model_dump_json(),
+        content=orjson.dumps(room_runtime.model_dump()),
     )
     r.raise_for_status()
 
@@ -468,7 +923,7 @@ def connect_command(
     help="The URL of the Jupyter MCP Server to stop. Defaults to 'http://localhost:4040'.",
 )
 def stop_command(jupyter_mcp_server_url: str):
-    r = httpx.delete(
+    r = _cli_client().delete(
         f"{jupyter_mcp_server_url}/api/stop",
     )
     r.raise_for_status()
@@ -545,6 +1000,13 @@ def stop_command(jupyter_mcp_server_url: str):
     default=4040,
     help="The port to use for the Streamable HTTP transport. Ignored for stdio transport.",
 )
+@click.option(
+    "--event-loop",
+    envvar="EVENT_LOOP",
+    type=click.Choice(["auto", "asyncio", "uvloop"]),
+    default="auto",
+    help="The uvicorn event loop for the Streamable HTTP transport. 'auto' uses uvloop when installed and asyncio otherwise. Defaults to 'auto'.",
+)
 def start_command(
     transport: str,
     start_new_runtime: bool,
@@ -556,26 +1018,23 @@ def start_command(
     room_token: str,
     port: int,
     provider: str,
+    event_loop: str,
 ):
     """Start the Jupyter MCP server with a transport."""
 
-    global TRANSPORT
-    TRANSPORT = transport
-
-    global PROVIDER
-    PROVIDER = provider
-
-    config.RUNTIME_URL = runtime_url
-    global START_NEW_RUNTIME
-    START_NEW_RUNTIME = start_new_runtime
-    config.RUNTIME_ID = runtime_id
-    config.RUNTIME_TOKEN = runtime_token
-
-    config.ROOM_URL = room_url
-    config.ROOM_ID = room_id
-    config.ROOM_TOKEN = room_token
+    cfg = set_config(
+        transport=transport,
+        provider=provider,
+        runtime_url=runtime_url,
+        start_new_runtime=start_new_runtime,
+        runtime_id=runtime_id,
+        runtime_token=runtime_token,
+        room_url=room_url,
+        room_id=room_id,
+        room_token=room_token,
+    )
 
-    if START_NEW_RUNTIME or config.RUNTIME_ID:
+    if cfg.START_NEW_RUNTIME or cfg.RUNTIME_ID:
         try:
             __start_kernel()
         except Exception as e:
@@ -589,7 +1048,10 @@ def start_command(
         # Don't initialize connection during startup - let tools establish it when needed
         # The asyncio.run() here was causing the connection to be destroyed when the event loop closed
         logger.info("HTTP transport ready - notebook connection will be established on first tool call")
-        uvicorn.run(mcp.streamable_http_app, host="0.0.0.0", port=port)  # noqa: S104
+        # One worker on purpose: the kernel, notebook connection and the config
+        # set through /api/connect live in this process. loop/http "auto" pick
+        # uvloop and httptools, which are dependencies, when available.
+        uvicorn.run(mcp.streamable_http_app, host="0.0.0.0", port=port, loop=event_loop, http="auto")  # noqa: S104
     else:
         raise Exception("Transport should be `stdio` or `streamable-http`.")
 
@@ -0,0 +1,48 @@
+# Copyright (c) 2023-2024 Datalayer, Inc.
+#
+# BSD 3-Clause License
+
+"""Unit tests for the immutable runtime configuration."""
+
+import dataclasses
+
+import pytest
+
+from jupyter_mcp_server import config
+
+
+@pytest.fixture(autouse=True)
+def base_config(monkeypatch):
+    """Start each test from known settings and restore the real ones after."""
+    base = config.get_config().replace(room_id="notebook.ipynb", room_token=None)
+    monkeypatch.setattr(config, "config", base)
+
+
+def test_replace_maps_lowercase_names_and_keeps_original():
+    original = config.get_config()
+
+    changed = original.replace(room_id="other.ipynb", room_token="token")  # noqa: S106
+
+    assert (changed.ROOM_ID, changed.ROOM_TOKEN) == ("other.ipynb", "token")
+    assert changed.RUNTIME_URL == original.RUNTIME_URL
+    assert (original.ROOM_ID, original.ROOM_TOKEN) == ("notebook.ipynb", None)
+
+
+def test_replace_rejects_unknown_fields():
+    with pytest.raises(TypeError):
+        config.get_config().replace(no_such_setting=1)
+
+
+def test_config_is_frozen():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.get_config().ROOM_ID = "other.ipynb"
+
+
+def test_set_config_swaps_in_a_new_instance():
+    before = config.get_config()
+
+    after = config.set_config(room_id="switched.ipynb")
+
+    assert config.get_config() is after
+    assert after.ROOM_ID == "switched.ipynb"
+    assert before.ROOM_ID == "notebook.ipynb"
@@ -0,0 +1,196 @@
+# Copyright (c) 2023-2024 Datalayer, Inc.
+#
+# BSD 3-Clause License
+
+"""Unit tests for the custom HTTP routes, run against the ASGI app in process."""
+
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+
+from jupyter_mcp_server import config, routes, server
+
+PAYLOAD = {
+    "provider": "jupyter",
+    "room_url": "http://room:8888",
+    "room_id": "notebook.ipynb",
+    "room_token": "room-token",
+    "runtime_url": "http://runtime:8888",
+    "runtime_id": "kernel-id",
+    "runtime_token": "runtime-token",
+}
+
+
+class _FakeKernel:
+    def __init__(self):
+        self._is_alive = lambda: True
+
+    def stop(self):
+        pass
+
+
+def _request(method: str, path: str, **kwargs) -> httpx.Response:
+    async def _send():
+        transport = httpx.ASGITransport(app=Starlette(routes=list(routes._CUSTOM_ROUTES)))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+
+    return asyncio.run(_send())
+
+
+@pytest.fixture
+def connect_calls(monkeypatch):
+    """Stub the kernel start and notebook reconnect; count the starts."""
+    calls = []
+
+    def _start_kernel():
+        calls.append(config.get_config())
+        server.kernel = _FakeKernel()
+
+    async def _reconnect_notebook():
+        pass
+
+    monkeypatch.setattr(server, "kernel", None)
+    monkeypatch.setattr(config, "config", config.get_config())
+    monkeypatch.setattr(routes, "_CURRENT_ROOM_RUNTIME", None)
+    monkeypatch.setitem(server.__dict__, "__start_kernel", _start_kernel)
+    monkeypatch.setitem(server.__dict__, "__reconnect_notebook", _reconnect_notebook)
+    return calls
+
+
+def test_connect_same_payload_is_cached(connect_calls):
+    first = _request("PUT", "/api/connect", json=PAYLOAD)
+    second = _request("PUT", "/api/connect", json=PAYLOAD)
+
+    assert first.json() == {"success": True}
+    assert second.json() == {"success": True, "cached": True}
+    assert len(connect_calls) == 1
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [("room_token", "rotated"), ("runtime_token", "rotated"), ("provider", "datalayer")],
+)
+def test_connect_applies_changed_credentials(connect_calls, field, value):
+    _request("PUT", "/api/connect", json=PAYLOAD)
+
+    response = _request("PUT", "/api/connect", json={**PAYLOAD, field: value})
+
+    assert response.json() == {"success": True}
+    assert len(connect_calls) == 2
+    assert getattr(config.get_config(), field.upper()) == value
+
+
+def test_connect_after_room_switch_reconnects(connect_calls):
+    _request("PUT", "/api/connect", json=PAYLOAD)
+    config.set_config(room_id="switched.ipynb")
+
+    response = _request("PUT", "/api/connect", json=PAYLOAD)
+
+    assert response.json() == {"success": True}
+    assert len(connect_calls) == 2
+    assert config.get_config().ROOM_ID == PAYLOAD["room_id"]
+
+
+def test_build_room_runtime_reuses_validated_payloads():
+    routes._build_room_runtime.cache_clear()
+    payload = tuple(sorted(PAYLOAD.items()))
+
+    first = routes._build_room_runtime(payload)
+    second = routes._build_room_runtime(payload)
+
+    assert first is second
+    assert routes._build_room_runtime.cache_info().hits == 1
+    assert first.room_token == PAYLOAD["room_token"]
+
+
+def test_build_room_runtime_rejects_unhashable_payloads():
+    # connect() falls back to direct validation on this TypeError
+    with pytest.raises(TypeError):
+        payload = {**PAYLOAD, "room_id": ["not", "hashable"]}
+        routes._build_room_runtime(tuple(sorted(payload.items())))
+
+
+@pytest.fixture
+def kernel_status(monkeypatch):
+    """Reset the cached health status; the returned dict sets what the probe reports."""
+    probed = {"status": "alive"}
+    monkeypatch.setattr(routes, "_probe_kernel_status", lambda: probed["status"])
+    monkeypatch.setattr(routes, "_last_kernel_status", "not_initialized")
+    monkeypatch.setattr(routes, "_last_kernel_status_ts", 0.0)
+    return probed
+
+
+def test_healthz_maps_unexpected_status_to_unknown(kernel_status):
+    kernel_status["status"] = "something-else"
+
+    assert _request("GET", "/api/healthz").json()["kernel_status"] == "unknown"
+
+
+def test_healthz_serves_refreshed_status(kernel_status, monkeypatch):
+    monkeypatch.setattr(routes, "_last_kernel_status", "alive")
+    monkeypatch.setattr(routes, "_last_kernel_status_ts", routes.time.monotonic())
+    kernel_status["status"] = "dead"
+
+    assert _request("GET", "/api/healthz").json()["kernel_status"] == "alive"
+
+
+def test_healthz_reports_stale_refresher(kernel_status, monkeypatch):
+    monkeypatch.setattr(routes, "_last_kernel_status", "alive")
+    refreshed_at = routes.time.monotonic() - routes._KERNEL_STATUS_MAX_AGE - 1
+    monkeypatch.setattr(routes, "_last_kernel_status_ts", refreshed_at)
+
+    assert _request("GET", "/api/healthz").json()["kernel_status"] == "stale"
+
+
+def test_refresher_updates_status_and_resets_on_cancel(kernel_status):
+    async def _run():
+        task = asyncio.create_task(routes.refresh_kernel_status(interval=0.01))
+        await asyncio.sleep(0.05)
+        seen = routes._last_kernel_status, routes._last_kernel_status_ts
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return seen
+
+    kernel_status["status"] = "dead"
+    status, refreshed_at = asyncio.run(_run())
+
+    assert status == "dead"
+    assert refreshed_at > 0.0
+    assert routes._last_kernel_status_ts == 0.0
+
+
+def test_refresher_records_probe_errors(kernel_status, monkeypatch):
+    def _failing_probe():
+        raise RuntimeError("probe failed")
+
+    monkeypatch.setattr(routes, "_probe_kernel_status", _failing_probe)
+
+    async def _run():
+        task = asyncio.create_task(routes.refresh_kernel_status(interval=0.01))
+        await asyncio.sleep(0.05)
+        status = routes._last_kernel_status
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return status
+
+    assert asyncio.run(_run()) == "error"
+
+
+def test_healthz_probes_per_request_without_refresher(kernel_status):
+    kernel_status["status"] = "dead"
+
+    response = _request("GET", "/api/healthz")
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "success": True,
+        "service": "jupyter-mcp-server",
+        "message": "Jupyter MCP Server is running.",
+        "status": "healthy",
+        "kernel_status": "dead",
+    }
@@ -0,0 +1,504 @@
+# Copyright (c) 2023-2024 Datalayer, Inc.
+#
+# BSD 3-Clause License
+
+"""Unit tests for the tool helpers: execution cache, cell deletion and notebook listings."""
+
+import asyncio
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from pycrdt import Array, Doc, Map
+
+from jupyter_mcp_server import server, tools
+
+
+class _FakeKernel:
+    def __init__(self, *args, **kwargs):
+        self.stopped = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+    def is_alive(self):
+        return True
+
+
+@pytest.fixture
+def fresh_kernel_state(monkeypatch):
+    """Isolate the kernel globals and the execution cache for one test."""
+    monkeypatch.setattr(server, "KernelClient", _FakeKernel)
+    monkeypatch.setattr(server, "kernel", None)
+    monkeypatch.setattr(server, "_kernel_generation", 0)
+    monkeypatch.setattr(tools, "_executed_generation", 0)
+    monkeypatch.setattr(tools, "_executed_sources", {})
+
+
+def test_kernel_restart_invalidates_executed_sources(fresh_kernel_state):
+    server.__start_kernel()
+    key = (server._kernel_generation, b"digest")
+    tools._remember_execution("cell-1", key)
+    assert tools._current_executed_sources().get("cell-1") == key
+
+    server.__start_kernel()
+
+    assert tools._current_executed_sources() == {}
+
+
+def test_restart_during_execution_is_not_remembered(fresh_kernel_state):
+    server.__start_kernel()
+    stale_key = (server._kernel_generation, b"digest")
+    server.__start_kernel()
+
+    tools._remember_execution("cell-1", stale_key)
+
+    assert "cell-1" not in tools._current_executed_sources()
+
+
+def test_room_switch_invalidates_executed_sources(fresh_kernel_state, monkeypatch):
+    async def _no_connection():
+        pass
+
+    monkeypatch.setitem(server.__dict__, "__start_notebook_connection", _no_connection)
+    monkeypatch.setattr(server, "set_config", lambda **fields: None)
+    tools._remember_execution("cell-1", (server._kernel_generation, b"digest"))
+
+    asyncio.run(server.__switch_room("other.ipynb"))
+
+    assert tools._current_executed_sources() == {}
+
+
+def test_executed_sources_are_bounded(fresh_kernel_state, monkeypatch):
+    monkeypatch.setattr(tools, "_EXECUTED_SOURCES_MAX", 3)
+    for n in range(5):
+        tools._remember_execution(f"cell-{n}", (0, b"digest"))
+
+    assert list(tools._current_executed_sources()) == ["cell-2", "cell-3", "cell-4"]
+
+
+def test_failed_execution_is_forgotten(fresh_kernel_state):
+    tools._remember_execution("cell-1", (0, b"digest"))
+    tools._remember_execution("cell-1", None)
+
+    assert "cell-1" not in tools._current_executed_sources()
+
+
+def test_concurrent_liveness_checks_start_one_kernel(fresh_kernel_state, monkeypatch):
+    started = []
+
+    class _SlowKernel(_FakeKernel):
+        def start(self):
+            started.append(self)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(server, "KernelClient", _SlowKernel)
+    threads = [threading.Thread(target=server.__check_kernel_alive) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(started) == 1
+    assert server.kernel is started[0]
+    assert server._kernel_generation == 1
+
+
+class _StatusKernel:
+    """Kernel whose REST refresh reports ``state`` and whose IOPub yields ``messages``."""
+
+    def __init__(self, state, messages=()):
+        self.execution_state = "idle"
+        self.state = state
+        self.messages = list(messages)
+        self.closed = False
+
+    def is_alive(self):
+        self.execution_state = self.state
+        return True
+
+
+def _status(state):
+    return {"msg_type": "status", "content": {"execution_state": state}}
+
+
+@pytest.fixture
+def idle_wait(monkeypatch):
+    monkeypatch.setattr(server, "_KERNEL_HAS_IS_ALIVE", True)
+    monkeypatch.setattr(server, "_executions_running", 0)
+
+
+@pytest.mark.parametrize("state, waited", [("busy", True), ("idle", False)])
+def test_wait_for_idle_reads_iopub_stream(idle_wait, state, waited):
+    kernel = _StatusKernel(state, [_status("busy"), _status("idle")])
+
+    class _Messages:
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not kernel.messages:
+                raise StopAsyncIteration
+            return kernel.messages.pop(0)
+
+        async def aclose(self):
+            kernel.closed = True
+
+    kernel.iopub_messages = _Messages
+    asyncio.run(server.__wait_for_kernel_idle(kernel, max_wait_seconds=1))
+
+    assert kernel.closed
+    assert (not kernel.messages) is waited
+
+
+@pytest.mark.parametrize("state", ["busy", "idle"])
+def test_wait_for_idle_listens_to_msg_ready(idle_wait, state):
+    kernel = _StatusKernel(state)
+    handlers = []
+    kernel._client = SimpleNamespace(
+        iopub_channel=SimpleNamespace(
+            msg_ready=SimpleNamespace(connect=handlers.append, disconnect=handlers.remove)
+        )
+    )
+
+    async def _run():
+        waiter = asyncio.ensure_future(server.__wait_for_kernel_idle(kernel, max_wait_seconds=1))
+        await asyncio.sleep(0.05)
+        if handlers:
+            threading.Thread(target=handlers[0], args=(_status("idle"),)).start()
+        started = time.monotonic()
+        await waiter
+        return time.monotonic() - started
+
+    assert asyncio.run(_run()) < 0.5
+    assert handlers == []
+
+
+# Directory tree served by the fake Contents API: path -> [(child path, type)]
+_TREE = {
+    "": [("a", "directory"), ("b", "directory"), ("x.ipynb", "notebook")],
+    "a": [("a/y.ipynb", "notebook"), ("a/c", "directory")],
+    "b": [("b/z.ipynb", "notebook")],
+    "a/c": [("a/c/w.ipynb", "notebook")],
+}
+# last_modified per notebook, and the resulting newest-first order
+_MODIFIED = {"x.ipynb": "4", "a/c/w.ipynb": "3", "b/z.ipynb": "2", "a/y.ipynb": "1"}
+_NEWEST_FIRST = ["x.ipynb", "a/c/w.ipynb", "b/z.ipynb", "a/y.ipynb"]
+# HTTP status per directory, for directories whose listing fails
+_STATUS = {}
+
+
+class _ContentsResponse:
+    def __init__(self, path):
+        self.status_code = _STATUS.get(path, 200)
+        items = [
+            {
+                "type": kind,
+                "path": child,
+                "name": child.rsplit("/", 1)[-1],
+                "last_modified": _MODIFIED.get(child),
+            }
+            for child, kind in _TREE.get(path, [])
+        ]
+        self.content = orjson.dumps({"content": items})
+
+
+@pytest.fixture
+def contents_api(monkeypatch):
+    """Serve _TREE through a fake shared HTTP client; record requested paths."""
+    requested = []
+
+    class _Client:
+        async def get(self, url, headers=None):
+            path = url.split("/api/contents", 1)[1].lstrip("/")
+            requested.append(path)
+            return _ContentsResponse(path)
+
+    @contextlib.asynccontextmanager
+    async def _http_client():
+        yield _Client()
+
+    monkeypatch.setitem(tools.__dict__, "__http_client", _http_client)
+    monkeypatch.setattr(tools, "_list_cache", {})
+    return requested
+
+
+def test_list_notebooks_sorts_newest_first(contents_api):
+    result = asyncio.run(tools.list_notebooks())
+
+    assert [nb["path"] for nb in result["notebooks"]] == _NEWEST_FIRST
+    assert result["total_found"] == 4
+    assert sorted(contents_api) == ["", "a", "a/c", "b"]
+
+
+@pytest.mark.parametrize("limit", [None, 4])
+def test_list_notebooks_orders_ties_by_path(contents_api, monkeypatch, limit):
+    for path in _MODIFIED:
+        monkeypatch.setitem(_MODIFIED, path, "1")
+
+    result = asyncio.run(tools.list_notebooks(limit=limit))
+
+    assert [nb["path"] for nb in result["notebooks"]] == sorted(_MODIFIED, reverse=True)
+    assert result["directories_scanned"] == ["", "a", "a/c", "b"]
+
+
+def test_list_notebooks_reports_failed_directories(contents_api, monkeypatch):
+    monkeypatch.setitem(_STATUS, "a", 500)
+
+    result = asyncio.run(tools.list_notebooks())
+
+    assert [nb["path"] for nb in result["notebooks"]] == ["x.ipynb", "b/z.ipynb"]
+    assert result["failed_directories"] == [{"path": "a", "error": "HTTP 500"}]
+
+
+@pytest.mark.parametrize(
+    "limit, expected",
+    [
+        (0, []),
+        (2, ["x.ipynb", "a/c/w.ipynb"]),
+        (10, _NEWEST_FIRST),
+    ],
+)
+def test_list_notebooks_limit_keeps_newest(contents_api, limit, expected):
+    result = asyncio.run(tools.list_notebooks(limit=limit))
+
+    assert [nb["path"] for nb in result["notebooks"]] == expected
+    assert result["total_found"] == 4
+
+
+def test_list_notebooks_rejects_negative_limit(contents_api):
+    with pytest.raises(ValueError, match="limit must be zero or a positive integer"):
+        asyncio.run(tools.list_notebooks(limit=-1))
+    assert contents_api == []
+
+
+def test_list_notebooks_respects_max_depth(contents_api):
+    result = asyncio.run(tools.list_notebooks(max_depth=1))
+
+    assert "a/c/w.ipynb" not in [nb["path"] for nb in result["notebooks"]]
+    assert "a/c" not in contents_api
+
+
+def test_list_notebooks_cache_serves_repeat_calls(contents_api):
+    asyncio.run(tools.list_notebooks())
+    scanned = len(contents_api)
+
+    asyncio.run(tools.list_notebooks())
+
+    assert len(contents_api) == scanned
+
+
+def test_list_notebooks_cache_expires(contents_api, monkeypatch):
+    asyncio.run(tools.list_notebooks())
+    scanned = len(contents_api)
+    monkeypatch.setattr(tools, "_LIST_CACHE_TTL", 0.0)
+
+    asyncio.run(tools.list_notebooks())
+
+    assert len(contents_api) == 2 * scanned
+
+
+def test_list_notebooks_does_not_cache_partial_results(contents_api, monkeypatch):
+    monkeypatch.setitem(_STATUS, "a", 500)
+    asyncio.run(tools.list_notebooks())
+    del _STATUS["a"]
+
+    result = asyncio.run(tools.list_notebooks())
+
+    assert result["notebooks"][1]["path"] == "a/c/w.ipynb"
+    assert result["failed_directories"] == []
+
+
+def test_list_notebooks_cache_returns_copies(contents_api):
+    first = asyncio.run(tools.list_notebooks())
+    first["notebooks"].clear()
+    first["search_params"]["max_depth"] = 99
+
+    second = asyncio.run(tools.list_notebooks())
+
+    assert second["total_found"] == len(second["notebooks"]) == 4
+    assert second["search_params"]["max_depth"] == 3
+    second["notebooks"][0]["path"] = "changed"
+    assert asyncio.run(tools.list_notebooks())["notebooks"][0]["path"] == "x.ipynb"
+
+
+def _open_doc(path):
+    return {"data": {"path": path, "factory": "Notebook"}}
+
+
+# Workspaces served by the fake workspaces API: the listing, and "lab" alone
+_WORKSPACES = {
+    "workspaces": {
+        "ids": ["lab", "mcp-focused-a-y"],
+        "values": [
+            {"metadata": {"id": "lab"}, "data": {"notebook:x.ipynb": _open_doc("x.ipynb")}},
+            {"metadata": {"id": "mcp-focused-a-y"}, "data": {"notebook:a/y.ipynb": _open_doc("a/y.ipynb")}},
+        ],
+    }
+}
+_DEFAULT_WORKSPACE = {
+    "metadata": {"id": "lab"},
+    "data": {"notebook:x.ipynb": _open_doc("x.ipynb"), "editor:b/z.ipynb": _open_doc("b/z.ipynb")},
+}
+
+
+class _JSONResponse:
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        if isinstance(self._body, Exception):
+            raise self._body
+        return self._body
+
+
+@pytest.fixture
+def workspaces_api(monkeypatch):
+    """Serve _WORKSPACES and _DEFAULT_WORKSPACE through a fake shared HTTP client."""
+    served = {"/lab/api/workspaces/": _WORKSPACES, "/lab/api/workspaces/lab": _DEFAULT_WORKSPACE}
+
+    class _Client:
+        async def get(self, url, headers=None):
+            body = served.get(url[url.index("/lab/api/"):])
+            if isinstance(body, OSError):
+                raise body
+            return _JSONResponse(body) if body is not None else _JSONResponse({}, 404)
+
+    @contextlib.asynccontextmanager
+    async def _http_client():
+        yield _Client()
+
+    monkeypatch.setitem(tools.__dict__, "__http_client", _http_client)
+    return served
+
+
+def test_list_open_notebooks_includes_named_workspaces(workspaces_api):
+    result = asyncio.run(tools.list_open_notebooks())
+
+    assert result["api_status"] == "success"
+    assert [nb["path"] for nb in result["open_notebooks"]] == ["x.ipynb", "a/y.ipynb", "b/z.ipynb"]
+    assert result["workspace_info"]["mcp-focused-a-y"]["total_open"] == 1
+
+
+@pytest.mark.parametrize(
+    "default_workspace",
+    [ConnectionResetError("reset"), ValueError("not JSON")],
+    ids=["request-error", "bad-body"],
+)
+def test_list_open_notebooks_default_workspace_is_best_effort(workspaces_api, monkeypatch, default_workspace):
+    monkeypatch.setitem(workspaces_api, "/lab/api/workspaces/lab", default_workspace)
+
+    result = asyncio.run(tools.list_open_notebooks())
+
+    assert result["api_status"] == "success"
+    assert [nb["path"] for nb in result["open_notebooks"]] == ["x.ipynb", "a/y.ipynb"]
+
+
+def test_list_open_notebooks_lists_each_path_once(workspaces_api, monkeypatch):
+    values = [
+        *_WORKSPACES["workspaces"]["values"],
+        {"metadata": {"id": "mcp-focused-x"}, "data": {"notebook:x.ipynb": _open_doc("x.ipynb")}},
+    ]
+    monkeypatch.setitem(workspaces_api, "/lab/api/workspaces/", {"workspaces": {"values": values}})
+
+    result = asyncio.run(tools.list_open_notebooks())
+
+    assert [nb["path"] for nb in result["open_notebooks"]] == ["x.ipynb", "a/y.ipynb", "b/z.ipynb"]
+    assert result["workspace_info"]["mcp-focused-x"]["total_open"] == 1
+
+
+def test_list_open_notebooks_without_default_workspace(workspaces_api):
+    del workspaces_api["/lab/api/workspaces/lab"]
+
+    result = asyncio.run(tools.list_open_notebooks())
+
+    assert [nb["path"] for nb in result["open_notebooks"]] == ["x.ipynb", "a/y.ipynb"]
+
+
+class _Notebook:
+    """The parts of NbModelClient that the cell helpers touch, over a real Y-doc."""
+
+    def __init__(self, cell_types):
+        self._lock = threading.Lock()
+        doc = Doc()
+        self._doc = SimpleNamespace(_ycells=doc.get("cells", type=Array))
+        for cell_type in cell_types:
+            cell = Map({"cell_type": cell_type, "source": "", "outputs": Array()})
+            self._doc._ycells.append(cell)
+
+
+def test_delete_cells_reports_each_index():
+    notebook = _Notebook(["markdown", "code", "code"])
+
+    results = asyncio.run(tools._delete_cells(notebook, [2, 0, 5, 2, -1]))
+
+    assert results == [
+        {"cell_index": 2, "cell_type": "code", "status": "deleted"},
+        {"cell_index": 0, "cell_type": "markdown", "status": "deleted"},
+        {"cell_index": 5, "cell_type": None, "status": "out_of_range", "cell_count": 3},
+        {"cell_index": 2, "cell_type": "code", "status": "duplicate"},
+        {"cell_index": -1, "cell_type": None, "status": "out_of_range", "cell_count": 3},
+    ]
+    assert [cell["cell_type"] for cell in notebook._doc._ycells.to_py()] == ["code"]
+
+
+def test_delete_cells_with_nothing_valid_leaves_notebook_unchanged():
+    notebook = _Notebook(["code"])
+
+    results = asyncio.run(tools._delete_cells(notebook, [3]))
+
+    assert [r["status"] for r in results] == ["out_of_range"]
+    assert len(notebook._doc._ycells) == 1
+
+
+class _InterruptibleKernel(_FakeKernel):
+    def __init__(self, fails=False):
+        super().__init__()
+        self.fails = fails
+
+    def interrupt(self):
+        if self.fails:
+            raise RuntimeError("interrupt failed")
+
+
+@pytest.fixture
+def hanging_execution(monkeypatch):
+    """Make every cell execution hang so that it times out, over a real Y-doc."""
+    async def _hang():
+        await asyncio.Event().wait()
+
+    async def _drain(task, grace_seconds=5.0):
+        task.cancel()
+
+    async def _prepare(cell_index):
+        notebook = _Notebook(["code"])
+        return notebook, notebook._doc._ycells[cell_index]
+
+    async def _run(operation, max_retries=1):
+        return await operation()
+
+    monkeypatch.setitem(tools.__dict__, "__submit_execution", lambda *args: asyncio.ensure_future(_hang()))
+    monkeypatch.setitem(tools.__dict__, "__drain_execution", _drain)
+    monkeypatch.setitem(tools.__dict__, "__safe_notebook_operation", _run)
+    monkeypatch.setattr(tools, "_prepare_cell_execution", _prepare)
+    monkeypatch.setattr(server, "_KERNEL_HAS_INTERRUPT", True)
+
+
+@pytest.mark.parametrize(
+    "kernel, interrupted",
+    [(None, False), (_InterruptibleKernel(fails=True), False), (_InterruptibleKernel(), True)],
+)
+def test_streaming_timeout_reports_interrupt_only_when_sent(hanging_execution, monkeypatch, kernel, interrupted):
+    monkeypatch.setattr(server, "kernel", kernel)
+
+    log = asyncio.run(tools.execute_cell_streaming(0, timeout_seconds=0.05, progress_interval=1))
+
+    assert log[0].startswith("[TIMEOUT at ")
+    assert ("[Sent interrupt signal to kernel]" in log) is interrupted
@@ -10,27 +10,54 @@ to interact with Jupyter notebooks through the Model Context Protocol.
 """
 
 import asyncio
+import contextlib
+import copy
+import hashlib
+import heapq
 import logging
 import time
+from collections import Counter
 from datetime import datetime
+from functools import lru_cache
 from typing import Union, Dict, Any, List
 
-import httpx
+import orjson
 from mcp.server import FastMCP
 
-import jupyter_mcp_server.config as config
+from jupyter_mcp_server.config import get_config
 import jupyter_mcp_server.server as server_module
 from jupyter_mcp_server.server import (
-    __ensure_kernel_alive, __ensure_notebook_connection,
-    __start_notebook_connection, __execute_cell_and_wait_for_completion, 
+    __ensure_kernel_alive, __get_notebook,
+    __switch_room, __execute_cell_and_wait_for_completion, 
     __wait_for_execution_outputs, __wait_for_cell_count_change, 
-    __wait_for_cell_content_change, __safe_notebook_operation,
-    __wait_for_kernel_idle
+    __wait_for_cell_content_change, __safe_notebook_operation, __with_notebook,
+    __wait_for_kernel_idle, __submit_execution, __drain_execution, __http_client
 )
-from jupyter_mcp_server.utils import extract_output, safe_extract_outputs, truncate_output, extract_image_info, safe_extract_outputs_with_images
+from jupyter_mcp_server.utils import extract_output, safe_extract_outputs, truncate_output, safe_extract_outputs_with_images
 
 logger = logging.getLogger(__name__)
 
+# Cell id -> (kernel generation, source digest) of its last error-free
+# execution, for execute_cell_simple_timeout(skip_if_unchanged=True).
+# Emptied once the kernel generation moves on; oldest entries go first
+# when it is full.
+_executed_sources: dict[str, tuple[int, bytes]] = {}
+_executed_generation = 0
+_EXECUTED_SOURCES_MAX = 1024
+
+# get_notebook_info computations in flight, per room; concurrent callers
+# await the same task instead of each reading the document
+_info_inflight: dict[str, asyncio.Task] = {}
+
+# Recent list_notebooks results, keyed by room settings and arguments, as
+# (monotonic time stored, result). Agents often list and then act, so a
+# short TTL spares the repeated Contents API walk. Creating or switching
+# notebooks here clears it; changes made outside this server can be missed
+# for up to _LIST_CACHE_TTL seconds. Callers get deep copies, never the
+# stored result. Listings with failed directories are never stored.
+_list_cache: dict[tuple, tuple[float, Dict[str, Any]]] = {}
+_LIST_CACHE_TTL = 5.0
+
 
 def register_tools(mcp_server: FastMCP):
     """Register all MCP tools with the provided FastMCP server instance."""
@@ -43,6 +70,7 @@ def register_tools(mcp_server: FastMCP):
     mcp_server.tool()(insert_markdown_cell)
     mcp_server.tool()(overwrite_cell_source)
     mcp_server.tool()(delete_cell)
+    mcp_server.tool()(delete_cells)
     
     # Code execution tools
     mcp_server.tool()(append_execute_code_cell)
@@ -54,6 +82,7 @@ def register_tools(mcp_server: FastMCP):
     # Reading tools
     mcp_server.tool()(read_all_cells)
     mcp_server.tool()(read_cell)
+    mcp_server.tool()(read_cells)
     mcp_server.tool()(get_notebook_info)
     
     # Notebook management tools
@@ -69,18 +98,19 @@ def register_tools(mcp_server: FastMCP):
 
 async def debug_connection_status() -> dict:
     """Debug tool to check connection status and configuration values."""
+    cfg = get_config()
     try:
         # Check configuration values
         debug_info = {
             "config": {
-                "ROOM_URL": config.ROOM_URL,
-                "ROOM_ID": config.ROOM_ID, 
-                "ROOM_TOKEN": config.ROOM_TOKEN[:10] + "..." if config.ROOM_TOKEN else None,
-                "PROVIDER": config.PROVIDER,
-                "RUNTIME_URL": config.RUNTIME_URL,
+                "ROOM_URL": cfg.ROOM_URL,
+                "ROOM_ID": cfg.ROOM_ID, 
+                "ROOM_TOKEN": cfg.ROOM_TOKEN[:10] + "..." if cfg.ROOM_TOKEN else None,
+                "PROVIDER": cfg.PROVIDER,
+                "RUNTIME_URL": cfg.RUNTIME_URL,
             },
             "connection_status": {
-                "kernel_status": "alive" if server_module.kernel and hasattr(server_module.kernel, 'is_alive') and server_module.kernel.is_alive() else "not_alive",
+                "kernel_status": "alive" if server_module.kernel and server_module._KERNEL_HAS_IS_ALIVE and server_module.kernel.is_alive() else "not_alive",
                 "notebook_connection_exists": server_module.notebook_connection is not None,
                 "notebook_connection_type": type(server_module.notebook_connection).__name__ if server_module.notebook_connection else "None",
             }
@@ -118,23 +148,19 @@ async def append_markdown_cell(cell_source: str) -> str:
     Returns:
         str: Success message (only returned after confirmed notebook synchronization)
     """
-    async def _append_markdown():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-        
+    async def _append_markdown(notebook):
         # Get initial cell count for synchronization
-        ydoc = server_module.notebook_connection._doc
-        initial_count = len(ydoc._ycells)
+        ycells = notebook._doc._ycells
+        initial_count = len(ycells)
         expected_count = initial_count + 1
         
         # Perform the operation
-        server_module.notebook_connection.add_markdown_cell(cell_source)
+        notebook.add_markdown_cell(cell_source)
         
         # Wait for confirmation that cell was actually added
-        if await __wait_for_cell_count_change(server_module.notebook_connection, expected_count):
+        if await __wait_for_cell_count_change(notebook, expected_count):
             # Verify the cell content matches what we added
-            final_ydoc = server_module.notebook_connection._doc
-            added_cell = final_ydoc._ycells[initial_count]  # The newly added cell
+            added_cell = ycells[initial_count]  # The newly added cell
             added_source = added_cell.get("source", "")
             if isinstance(added_source, list):
                 added_source = ''.join(added_source)
@@ -146,7 +172,7 @@ async def append_markdown_cell(cell_source: str) -> str:
         else:
             raise Exception("Timeout waiting for cell addition confirmation")
     
-    return await __safe_notebook_operation(_append_markdown)
+    return await __with_notebook(_append_markdown)
 
 
 
@@ -160,23 +186,19 @@ async def insert_markdown_cell(cell_index: int, cell_source: str) -> str:
     Returns:
         str: Success message (only returned after confirmed notebook synchronization)
     """
-    async def _insert_markdown():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-        
+    async def _insert_markdown(notebook):
         # Get initial cell count for synchronization
-        ydoc = server_module.notebook_connection._doc
-        initial_count = len(ydoc._ycells)
+        ycells = notebook._doc._ycells
+        initial_count = len(ycells)
         expected_count = initial_count + 1
         
         # Perform the operation
-        server_module.notebook_connection.insert_markdown_cell(cell_index, cell_source)
+        notebook.insert_markdown_cell(cell_index, cell_source)
         
         # Wait for confirmation that cell was actually inserted
-        if await __wait_for_cell_count_change(server_module.notebook_connection, expected_count):
+        if await __wait_for_cell_count_change(notebook, expected_count):
             # Verify the cell was inserted at correct position with correct content
-            final_ydoc = server_module.notebook_connection._doc
-            inserted_cell = final_ydoc._ycells[cell_index]  # The cell at insertion position
+            inserted_cell = ycells[cell_index]  # The cell at insertion position
             inserted_source = inserted_cell.get("source", "")
             if isinstance(inserted_source, list):
                 inserted_source = ''.join(inserted_source)
@@ -188,7 +210,7 @@ async def insert_markdown_cell(cell_index: int, cell_source: str) -> str:
         else:
             raise Exception("Timeout waiting for cell insertion confirmation")
     
-    return await __safe_notebook_operation(_insert_markdown)
+    return await __with_notebook(_insert_markdown)
 
 
 
@@ -203,25 +225,22 @@ async def overwrite_cell_source(cell_index: int, cell_source: str) -> str:
     Returns:
         str: Success message (only returned after confirmed notebook synchronization)
     """
-    async def _overwrite_cell():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-        
+    async def _overwrite_cell(notebook):
         # Verify cell exists before attempting to overwrite
-        ydoc = server_module.notebook_connection._doc
-        if cell_index >= len(ydoc._ycells):
-            raise Exception(f"Cell index {cell_index} out of range (notebook has {len(ydoc._ycells)} cells)")
+        ncells = len(notebook._doc._ycells)
+        if not 0 <= cell_index < ncells:
+            raise Exception(f"Cell index {cell_index} out of range (notebook has {ncells} cells)")
         
         # Perform the operation
-        server_module.notebook_connection.set_cell_source(cell_index, cell_source)
+        notebook.set_cell_source(cell_index, cell_source)
         
         # Wait for confirmation that cell content was actually updated
-        if await __wait_for_cell_content_change(server_module.notebook_connection, cell_index, cell_source):
+        if await __wait_for_cell_content_change(notebook, cell_index, cell_source):
             return f"Cell {cell_index} overwritten successfully and confirmed - use execute_cell to execute it if code"
         else:
             raise Exception("Timeout waiting for cell content update confirmation")
     
-    return await __safe_notebook_operation(_overwrite_cell)
+    return await __with_notebook(_overwrite_cell)
 
 
 
@@ -236,50 +255,21 @@ async def append_execute_code_cell(cell_source: str, full_output: bool = False)
         dict: Cell object with cell_index, cell_id, content, output, images, and conditional error/warning fields
     """
     async def _append_execute():
-        await __ensure_kernel_alive()
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
+        # Kernel probe and shared notebook connection are independent round-trips
+        _, notebook = await asyncio.gather(__ensure_kernel_alive(), __get_notebook())
         
-        cell_index = server_module.notebook_connection.add_code_cell(cell_source)
+        cell_index = notebook.add_code_cell(cell_source)
         
         # Execute cell and wait for actual completion
-        await __execute_cell_and_wait_for_completion(server_module.notebook_connection, cell_index, server_module.kernel)
+        await __execute_cell_and_wait_for_completion(notebook, cell_index, server_module.kernel)
         
         # Wait for outputs to be available
-        await __wait_for_execution_outputs(server_module.notebook_connection, cell_index)
-        
-        # Now safely read the execution outputs with structured image handling and error/warning detection
-        ydoc = server_module.notebook_connection._doc
-        cell = ydoc._ycells[cell_index]
-        outputs = cell["outputs"]
-        output_data = safe_extract_outputs_with_images(outputs, full_output)
-        
-        # Get cell ID if available
-        cell_id = str(cell.get("id", f"cell-{cell_index}"))
+        await __wait_for_execution_outputs(notebook, cell_index)
         
-        # Ensure content is serializable
-        content = cell_source
-        if hasattr(content, 'to_py'):
-            content = content.to_py()
-        content = str(content)
-        
-        result = {
-            "cell_index": cell_index,
-            "cell_id": cell_id,
-            "content": content,
-            "output": output_data["text_outputs"],
-            "images": output_data["images"]
-        }
-        
-        # Add error field only if there's an error
-        if "error" in output_data:
-            result["error"] = output_data["error"]
-        
-        # Add warning field only if there's a warning
-        if "warning" in output_data:
-            result["warning"] = output_data["warning"]
-        
-        return result
+        # Read the executed cell back in one locked pass, with structured image
+        # handling and error/warning detection
+        cell, = _snapshot_cells_at(notebook, [cell_index])
+        return _cell_info(cell_index, cell, full_output)
     
     return await __safe_notebook_operation(_append_execute)
 
@@ -297,55 +287,183 @@ async def insert_execute_code_cell(cell_index: int, cell_source: str, full_outpu
         dict: Cell object with cell_index, cell_id, content, output, images, and conditional error/warning fields
     """
     async def _insert_execute():
-        await __ensure_kernel_alive()
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
+        # Kernel probe and shared notebook connection are independent round-trips
+        _, notebook = await asyncio.gather(__ensure_kernel_alive(), __get_notebook())
         
-        server_module.notebook_connection.insert_code_cell(cell_index, cell_source)
+        notebook.insert_code_cell(cell_index, cell_source)
         
         # Execute cell and wait for actual completion
-        await __execute_cell_and_wait_for_completion(server_module.notebook_connection, cell_index, server_module.kernel)
+        await __execute_cell_and_wait_for_completion(notebook, cell_index, server_module.kernel)
         
         # Wait for outputs to be available
-        await __wait_for_execution_outputs(server_module.notebook_connection, cell_index)
+        await __wait_for_execution_outputs(notebook, cell_index)
         
-        # Now safely read the execution outputs with structured image handling and error/warning detection
-        ydoc = server_module.notebook_connection._doc
-        cell = ydoc._ycells[cell_index]
-        outputs = cell["outputs"]
-        output_data = safe_extract_outputs_with_images(outputs, full_output)
-        
-        # Get cell ID if available
-        cell_id = str(cell.get("id", f"cell-{cell_index}"))
-        
-        # Ensure content is serializable
-        content = cell_source
-        if hasattr(content, 'to_py'):
-            content = content.to_py()
-        content = str(content)
-        
-        result = {
-            "cell_index": cell_index,
-            "cell_id": cell_id,
-            "content": content,
-            "output": output_data["text_outputs"],
-            "images": output_data["images"]
-        }
-        
-        # Add error field only if there's an error
-        if "error" in output_data:
-            result["error"] = output_data["error"]
-        
-        # Add warning field only if there's a warning
-        if "warning" in output_data:
-            result["warning"] = output_data["warning"]
-        
-        return result
+        # Read the executed cell back in one locked pass, with structured image
+        # handling and error/warning detection
+        cell, = _snapshot_cells_at(notebook, [cell_index])
+        return _cell_info(cell_index, cell, full_output)
     
     return await __safe_notebook_operation(_insert_execute)
 
 
 
+async def _prepare_cell_execution(cell_index: int):
+    """Make sure kernel and notebook are ready and the cell index is valid.
+
+    Returns:
+        tuple: The notebook client and the Y-map of the cell to execute
+    """
+    async def _kernel_ready():
+        await __ensure_kernel_alive()
+        await __wait_for_kernel_idle(server_module.kernel, max_wait_seconds=30)
+
+    _, notebook = await asyncio.gather(_kernel_ready(), __get_notebook())
+
+    ycells = notebook._doc._ycells
+    ncells = len(ycells)
+    if not 0 <= cell_index < ncells:
+        raise ValueError(
+            f"Cell index {cell_index} is out of range. Notebook has {ncells} cells."
+        )
+    return notebook, ycells[cell_index]
+
+
+def _interrupt_kernel() -> bool:
+    """Send an interrupt to the kernel; returns whether it was sent."""
+    try:
+        if server_module.kernel and server_module._KERNEL_HAS_INTERRUPT:
+            server_module.kernel.interrupt()
+            logger.info("Sent interrupt signal to kernel")
+            return True
+    except Exception as interrupt_err:
+        logger.error("Failed to interrupt kernel: %s", interrupt_err)
+    return False
+
+
+def _outputs_since(notebook, youtputs, start: int) -> list:
+    """Copy out only the outputs appended at or after index ``start``."""
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        new_outputs = []
+        for j in range(start, len(youtputs)):
+            output = youtputs[j]
+            new_outputs.append(output.to_py() if hasattr(output, 'to_py') else output)
+    return new_outputs
+
+
+def _cell_outputs(notebook, ycell) -> list:
+    """Copy out all of a cell's current outputs, ready for extraction."""
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        youtputs = ycell.get("outputs")
+    return _outputs_since(notebook, youtputs, 0) if youtputs is not None else []
+
+
+async def _execute_cell_core(notebook, ycell, cell_index: int, timeout_seconds: float, tick: float = 1.0,
+                             on_new_outputs=None, on_tick=None) -> int:
+    """Execute a cell and watch its outputs until it finishes or times out.
+
+    Shared by the execute_cell_* tools, which differ only in what they do
+    while the cell runs:
+        on_new_outputs(new_outputs, elapsed) is called when outputs grew
+        on_tick(elapsed, output_count) is called once per tick
+
+    Returns:
+        int: Number of outputs already passed to on_new_outputs
+
+    Raises:
+        asyncio.TimeoutError: After interrupting the kernel and draining the execution.
+            Its ``interrupted`` attribute tells whether the interrupt was sent
+    """
+    logger.info("Starting execution of cell %s with %ss timeout", cell_index, timeout_seconds)
+
+    loop = asyncio.get_running_loop()
+    execution_task = asyncio.ensure_future(
+        __submit_execution(notebook, cell_index, server_module.kernel)
+    )
+
+    start_time = time.monotonic()
+    deadline = start_time + timeout_seconds
+    next_tick = start_time + tick
+    last_output_count = 0
+
+    # Wake up when the cell changes instead of polling its outputs. Updates
+    # may be applied from the execution thread, hence call_soon_threadsafe.
+    outputs_changed = asyncio.Event()
+    subscription = None
+    if on_new_outputs is not None and hasattr(ycell, 'observe_deep'):
+        subscription = ycell.observe_deep(lambda events: loop.call_soon_threadsafe(outputs_changed.set))
+    # Without an observer, fall back to checking outputs once per tick
+    poll_outputs = on_new_outputs is not None and subscription is None
+    # The execution thread writes outputs while holding the client's lock;
+    # observers fire inside that write, so read only once it is released
+    doc_lock = getattr(notebook, '_lock', None) or contextlib.nullcontext()
+    # execute_cell clears the outputs array in place, so the handle stays valid
+    with doc_lock:
+        youtputs = ycell.get("outputs")
+    if youtputs is None:
+        youtputs = ()
+    changed_waiter = None
+
+    try:
+        while True:
+            wake_at = deadline
+            if on_tick is not None or poll_outputs:
+                wake_at = min(wake_at, next_tick)
+
+            waiters = {execution_task}
+            if subscription is not None:
+                if changed_waiter is None:
+                    changed_waiter = asyncio.ensure_future(outputs_changed.wait())
+                waiters.add(changed_waiter)
+
+            done, _ = await asyncio.wait(
+                waiters, timeout=max(0.0, wake_at - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+            )
+            now = time.monotonic()
+            elapsed = now - start_time
+
+            if changed_waiter in done:
+                # Clear before reading so changes made meanwhile wake us again
+                outputs_changed.clear()
+                changed_waiter = None
+
+            if on_new_outputs is not None:
+                try:
+                    new_outputs = _outputs_since(notebook, youtputs, last_output_count)
+                    if new_outputs:
+                        on_new_outputs(new_outputs, elapsed)
+                        last_output_count += len(new_outputs)
+                except Exception as e:
+                    logger.warning("Error checking outputs of cell %d: %s", cell_index, e)
+
+            if execution_task in done:
+                break
+
+            if now >= deadline:
+                interrupted = _interrupt_kernel()
+                await __drain_execution(execution_task)
+                timeout_error = asyncio.TimeoutError(f"Cell {cell_index} execution timed out after {elapsed:.1f}s")
+                timeout_error.interrupted = interrupted
+                raise timeout_error
+
+            if now >= next_tick:
+                if on_tick is not None:
+                    on_tick(elapsed, last_output_count)
+                next_tick += tick
+    finally:
+        if changed_waiter is not None:
+            changed_waiter.cancel()
+        if subscription is not None:
+            try:
+                ycell.unobserve(subscription)
+            except Exception as e:
+                logger.debug("Could not unobserve cell %d: %s", cell_index, e)
+
+    # Re-raise any execution error
+    await execution_task
+    logger.info("Cell %s execution completed successfully in %.2fs", cell_index, time.monotonic() - start_time)
+    return last_output_count
+
+
 async def execute_cell_with_progress(cell_index: int, timeout_seconds: int = 300, full_output: bool = False) -> Dict[str, Any]:
     """Execute a specific cell with timeout and progress monitoring.
     Args:
@@ -355,51 +473,31 @@ async def execute_cell_with_progress(cell_index: int, timeout_seconds: int = 300
     Returns:
         dict: {'text_outputs': list[str], 'images': list[dict], 'error': dict, 'warning': dict} - Clean text outputs, structured image data, and conditional error/warning info
     """
-    async def _execute():
-        await __ensure_kernel_alive()
-        await __wait_for_kernel_idle(server_module.kernel, max_wait_seconds=30)
-        
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-
-        ydoc = server_module.notebook_connection._doc
+    def _log_progress(new_outputs, elapsed):
+        logger.info("Cell %d: %d new output(s) at %.1fs", cell_index, len(new_outputs), elapsed)
 
-        if cell_index < 0 or cell_index >= len(ydoc._ycells):
-            raise ValueError(
-                f"Cell index {cell_index} is out of range. Notebook has {len(ydoc._ycells)} cells."
-            )
+    async def _execute():
+        notebook, ycell = await _prepare_cell_execution(cell_index)
 
-        logger.info(f"Starting execution of cell {cell_index} with {timeout_seconds}s timeout")
-        
         try:
-            # Execute cell and wait for actual completion
-            await __execute_cell_and_wait_for_completion(server_module.notebook_connection, cell_index, server_module.kernel, timeout_seconds)
+            await _execute_cell_core(notebook, ycell, cell_index, timeout_seconds, on_new_outputs=_log_progress)
             
             # Wait for outputs to be available
-            await __wait_for_execution_outputs(server_module.notebook_connection, cell_index)
+            await __wait_for_execution_outputs(notebook, cell_index)
 
             # Get final outputs with structured image handling and error/warning detection
-            ydoc = server_module.notebook_connection._doc
-            outputs = ydoc._ycells[cell_index]["outputs"]
-            result = safe_extract_outputs_with_images(outputs, full_output)
+            result = safe_extract_outputs_with_images(_cell_outputs(notebook, ycell), full_output)
             
-            logger.info(f"Cell {cell_index} completed successfully with {len(result['text_outputs'])} text outputs and {len(result['images'])} images")
+            logger.info("Cell %s completed successfully with %d text outputs and %d images",
+                        cell_index, len(result['text_outputs']), len(result['images']))
             return result
             
         except asyncio.TimeoutError as e:
-            logger.error(f"Cell {cell_index} execution timed out: {e}")
-            try:
-                if server_module.kernel and hasattr(server_module.kernel, 'interrupt'):
-                    server_module.kernel.interrupt()
-                    logger.info("Sent interrupt signal to kernel")
-            except Exception as interrupt_err:
-                logger.error(f"Failed to interrupt kernel: {interrupt_err}")
+            logger.error("Cell %s execution timed out: %s", cell_index, e)
             
             # Return partial outputs if available
             try:
-                ydoc = server_module.notebook_connection._doc
-                outputs = ydoc._ycells[cell_index].get("outputs", [])
-                partial_result = safe_extract_outputs_with_images(outputs, full_output)
+                partial_result = safe_extract_outputs_with_images(_cell_outputs(notebook, ycell), full_output)
                 partial_result["text_outputs"].append(f"[TIMEOUT ERROR: Execution exceeded {timeout_seconds} seconds]")
                 return partial_result
             except Exception:
@@ -411,14 +509,46 @@ async def execute_cell_with_progress(cell_index: int, timeout_seconds: int = 300
             }
             
         except Exception as e:
-            logger.error(f"Error executing cell {cell_index}: {e}")
+            logger.error("Error executing cell %s: %s", cell_index, e)
             raise
         
     return await __safe_notebook_operation(_execute, max_retries=1)
 
+def _execution_key(notebook, ycell) -> tuple[str | None, tuple[int, bytes]]:
+    """Cell id and (kernel generation, source digest) identifying one execution of a cell."""
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        cell_id = ycell.get("id")
+        source = str(ycell.get("source", ""))
+    digest = hashlib.blake2b(source.encode(), digest_size=16).digest()
+    return (str(cell_id) if cell_id else None), (server_module._kernel_generation, digest)
+
+
+def _current_executed_sources() -> dict[str, tuple[int, bytes]]:
+    """The remembered executions, emptied first if the kernel generation moved on."""
+    global _executed_generation
+    generation = server_module._kernel_generation
+    if generation != _executed_generation:
+        # New kernel or room: nothing that ran before is in its state
+        _executed_sources.clear()
+        _executed_generation = generation
+    return _executed_sources
+
+
+def _remember_execution(cell_id: str, key: tuple[int, bytes] | None) -> None:
+    """Record (or with ``None``, forget) the cell's last error-free execution."""
+    sources = _current_executed_sources()
+    sources.pop(cell_id, None)
+    # A key from before a restart describes a kernel that is gone
+    if key is None or key[0] != _executed_generation:
+        return
+    if len(sources) >= _EXECUTED_SOURCES_MAX:
+        del sources[next(iter(sources))]
+    sources[cell_id] = key
+
 # Simpler real-time monitoring without forced sync
 
-async def execute_cell_simple_timeout(cell_index: int, timeout_seconds: int = 300, full_output: bool = False) -> Dict[str, Any]:
+async def execute_cell_simple_timeout(cell_index: int, timeout_seconds: int = 300, full_output: bool = False,
+                                      skip_if_unchanged: bool = False) -> Dict[str, Any]:
     """Execute a cell with simple timeout (no forced real-time sync). To be used for short-running cells.
     This won't force real-time updates but will work reliably.
     
@@ -426,34 +556,31 @@ async def execute_cell_simple_timeout(cell_index: int, timeout_seconds: int = 30
         cell_index: Index of the cell to execute (0-based)
         timeout_seconds: Maximum execution time in seconds (default 300)
         full_output: If True, return complete execution outputs without truncation (default False)
+        skip_if_unchanged: If True and this cell's source already ran without error in the
+            current kernel, return its existing outputs instead of running it again (default False)
         
     Returns:
         dict: {'text_outputs': list[str], 'images': list[dict], 'error': dict, 'warning': dict} - Clean text outputs, structured image data, and conditional error/warning info
     """
     async def _execute():
-        await __ensure_kernel_alive()
-        await __wait_for_kernel_idle(server_module.kernel, max_wait_seconds=30)
-        
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-
-        ydoc = server_module.notebook_connection._doc
-        if cell_index < 0 or cell_index >= len(ydoc._ycells):
-            raise ValueError(f"Cell index {cell_index} is out of range.")
+        notebook, ycell = await _prepare_cell_execution(cell_index)
+        cell_id, key = _execution_key(notebook, ycell)
 
-        logger.info(f"Starting execution of cell {cell_index} with {timeout_seconds}s timeout")
-        
-        # Execute cell and wait for actual completion
-        await __execute_cell_and_wait_for_completion(server_module.notebook_connection, cell_index, server_module.kernel, timeout_seconds)
-        
-        # Wait for outputs to be available
-        await __wait_for_execution_outputs(server_module.notebook_connection, cell_index)
+        if skip_if_unchanged and cell_id is not None and _current_executed_sources().get(cell_id) == key:
+            logger.info("Cell %s unchanged since its last run, reusing outputs", cell_index)
+        else:
+            await _execute_cell_core(notebook, ycell, cell_index, timeout_seconds)
+            
+            # Wait for outputs to be available
+            await __wait_for_execution_outputs(notebook, cell_index)
 
         # Get final outputs with structured image handling and error/warning detection
-        outputs = ydoc._ycells[cell_index]["outputs"]
-        result = safe_extract_outputs_with_images(outputs, full_output)
+        result = safe_extract_outputs_with_images(_cell_outputs(notebook, ycell), full_output)
+
+        if cell_id is not None:
+            _remember_execution(cell_id, None if "error" in result else key)
         
-        logger.info(f"Cell {cell_index} completed successfully")
+        logger.info("Cell %s completed successfully", cell_index)
         return result
     
     return await __safe_notebook_operation(_execute, max_retries=1)
@@ -471,85 +598,142 @@ async def execute_cell_streaming(cell_index: int, timeout_seconds: int = 300, pr
         list[str]: List of outputs including progress updates (truncated by default to 1000 chars for LLM context efficiency)
     """
     async def _execute_streaming():
-        await __ensure_kernel_alive()
-        await __wait_for_kernel_idle(server_module.kernel, max_wait_seconds=30)
-        
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
+        notebook, ycell = await _prepare_cell_execution(cell_index)
         outputs_log = []
 
-        ydoc = server_module.notebook_connection._doc
-        if cell_index < 0 or cell_index >= len(ydoc._ycells):
-            raise ValueError(f"Cell index {cell_index} is out of range.")
+        last_logged_second = -1
 
-        # Start execution in background
-        execution_task = asyncio.create_task(
-            asyncio.to_thread(server_module.notebook_connection.execute_cell, cell_index, server_module.kernel)
-        )
-        
-        start_time = time.time()
-        last_output_count = 0
-        
-        # Monitor progress
-        while not execution_task.done():
-            elapsed = time.time() - start_time
-            
-            # Check timeout
-            if elapsed > timeout_seconds:
-                execution_task.cancel()
-                outputs_log.append(f"[TIMEOUT at {elapsed:.1f}s: Cancelling execution]")
-                try:
-                    server_module.kernel.interrupt()
-                    outputs_log.append("[Sent interrupt signal to kernel]")
-                except Exception:
-                    pass
-                break
-            
-            # Check for new outputs
-            try:
-                current_outputs = ydoc._ycells[cell_index].get("outputs", [])
-                if len(current_outputs) > last_output_count:
-                    new_outputs = current_outputs[last_output_count:]
-                    for output in new_outputs:
-                        extracted = extract_output(output)
-                        if extracted.strip():
-                            truncated = truncate_output(extracted, full_output)
-                            outputs_log.append(f"[{elapsed:.1f}s] {truncated}")
-                    last_output_count = len(current_outputs)
-            
-            except Exception as e:
-                outputs_log.append(f"[{elapsed:.1f}s] Error checking outputs: {e}")
-            
-            # Progress update
-            if int(elapsed) % progress_interval == 0 and elapsed > 0:
-                outputs_log.append(f"[PROGRESS: {elapsed:.1f}s elapsed, {last_output_count} outputs so far]")
+        def _collect_outputs(new_outputs, elapsed):
+            nonlocal last_logged_second
+            texts = [
+                truncate_output(text, full_output)
+                for text in map(extract_output, new_outputs) if text.strip()
+            ]
+            if not texts:
+                return
+            # Timestamp only the first output of each second
+            second = int(elapsed)
+            if second != last_logged_second:
+                last_logged_second = second
+                texts[0] = f"[{elapsed:.1f}s] {texts[0]}"
+            outputs_log.extend(texts)
+
+        next_progress_at = progress_interval
+
+        def _report_progress(elapsed, output_count):
+            nonlocal next_progress_at
+            if elapsed >= next_progress_at:
+                outputs_log.append(f"[PROGRESS: {elapsed:.1f}s elapsed, {output_count} outputs so far]")
+                next_progress_at += progress_interval
+
+        start_time = time.monotonic()
+        try:
+            # Outputs arrive through the cell observer, so the only timed
+            # wake-ups needed are the progress lines
+            last_output_count = await _execute_cell_core(
+                notebook, ycell, cell_index, timeout_seconds, tick=max(progress_interval, 1),
+                on_new_outputs=_collect_outputs, on_tick=_report_progress,
+            )
+        except asyncio.TimeoutError as e:
+            outputs_log.append(f"[TIMEOUT at {time.monotonic() - start_time:.1f}s: Cancelling execution]")
+            if getattr(e, "interrupted", False):
+                outputs_log.append("[Sent interrupt signal to kernel]")
+        except Exception as e:
+            outputs_log.append(f"[ERROR: {e}]")
+        else:
+            outputs_log.append(f"[COMPLETED in {time.monotonic() - start_time:.1f}s]")
             
-            await asyncio.sleep(1)
-        
-        # Get final result
-        if not execution_task.cancelled():
-            try:
-                await execution_task
-                final_outputs = ydoc._ycells[cell_index].get("outputs", [])
-                outputs_log.append(f"[COMPLETED in {time.time() - start_time:.1f}s]")
-                
-                # Add any final outputs not captured during monitoring
-                if len(final_outputs) > last_output_count:
-                    remaining = final_outputs[last_output_count:]
-                    for output in remaining:
-                        extracted = extract_output(output)
-                        if extracted.strip():
-                            truncated = truncate_output(extracted, full_output)
-                            outputs_log.append(truncated)
-                            
-            except Exception as e:
-                outputs_log.append(f"[ERROR: {e}]")
+            # Add any final outputs not captured during monitoring
+            with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+                youtputs = ycell.get("outputs")
+            for output in _outputs_since(notebook, youtputs or (), last_output_count):
+                extracted = extract_output(output)
+                if extracted.strip():
+                    outputs_log.append(truncate_output(extracted, full_output))
         
         return outputs_log if outputs_log else ["[No output generated]"]
             
     return await __safe_notebook_operation(_execute_streaming, max_retries=1)
 
 
+def _snapshot_cells(notebook) -> list:
+    """Copy every cell out of the Y-doc in a single pass, as plain Python."""
+    ycells = notebook._doc._ycells
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        return ycells.to_py() if hasattr(ycells, 'to_py') else list(ycells)
+
+
+def _count_cell_types(notebook) -> Counter:
+    """Tally cell types, reading only ``cell_type`` from each Y-map.
+
+    Cheaper than a full snapshot, which would also copy every source and
+    output just to look at one key per cell.
+    """
+    ycells = notebook._doc._ycells
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        return Counter(cell.get("cell_type") or "unknown" for cell in ycells)
+
+
+def _snapshot_cells_at(notebook, cell_indices: list[int]) -> list:
+    """Copy only the requested cells out of the Y-doc, as plain Python.
+
+    Raises:
+        ValueError: If any index is out of range; nothing is read then
+    """
+    ycells = notebook._doc._ycells
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        ncells = len(ycells)
+        for index in cell_indices:
+            if not 0 <= index < ncells:
+                raise ValueError(
+                    f"Cell index {index} is out of range. Notebook has {ncells} cells."
+                )
+        cells = [ycells[index] for index in cell_indices]
+        return [cell.to_py() if hasattr(cell, 'to_py') else cell for cell in cells]
+
+
+def _cell_info(cell_index: int, cell: dict, full_output: bool = False) -> Dict[str, Any]:
+    """Structured view of a snapshotted cell, as returned by the reading tools."""
+    # Get cell ID if available (some Jupyter implementations have this)
+    cell_id = str(cell.get("id", f"cell-{cell_index}"))
+    
+    # Ensure content is properly serializable
+    content = cell.get("source", "")
+    if isinstance(content, list):
+        content = ''.join(str(item) for item in content)
+    else:
+        content = str(content)
+    
+    cell_info = {
+        "cell_index": cell_index,
+        "cell_id": cell_id,
+        "content": content,
+        "output": [],
+        "images": []
+    }
+
+    # Add outputs for code cells with structured image handling and error/warning detection
+    if cell.get("cell_type") == "code":
+        try:
+            outputs = cell.get("outputs", [])
+            output_data = safe_extract_outputs_with_images(outputs, full_output)
+            cell_info["output"] = output_data["text_outputs"]
+            cell_info["images"] = output_data["images"]
+            
+            # Add error field only if there's an error
+            if "error" in output_data:
+                cell_info["error"] = output_data["error"]
+            
+            # Add warning field only if there's a warning
+            if "warning" in output_data:
+                cell_info["warning"] = output_data["warning"]
+                
+        except Exception as e:
+            cell_info["output"] = [f"[Error reading outputs: {str(e)}]"]
+
+    return cell_info
+
+
 async def read_all_cells(full_output: bool = False) -> List[Dict[str, Any]]:
     """Read all cells from the Jupyter notebook with clean structured format.
     
@@ -559,59 +743,10 @@ async def read_all_cells(full_output: bool = False) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Array of cell objects with consistent structure including conditional error/warning fields
     """
-    async def _read_all():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-        
-        ydoc = server_module.notebook_connection._doc
-        cells = []
-
-        for i, cell in enumerate(ydoc._ycells):
-            # Get cell ID if available (some Jupyter implementations have this)
-            cell_id = str(cell.get("id", f"cell-{i}"))
-            
-            # Ensure content is properly serializable
-            content = cell.get("source", "")
-            if hasattr(content, 'to_py'):
-                # Handle pycrdt Text objects
-                content = content.to_py()
-            if isinstance(content, list):
-                content = ''.join(str(item) for item in content)
-            else:
-                content = str(content)
-            
-            cell_info = {
-                "cell_index": i,
-                "cell_id": cell_id,
-                "content": content,
-                "output": [],
-                "images": []
-            }
-
-            # Add outputs for code cells with structured image handling and error/warning detection
-            if cell.get("cell_type") == "code":
-                try:
-                    outputs = cell.get("outputs", [])
-                    output_data = safe_extract_outputs_with_images(outputs, full_output)
-                    cell_info["output"] = output_data["text_outputs"]
-                    cell_info["images"] = output_data["images"]
-                    
-                    # Add error field only if there's an error
-                    if "error" in output_data:
-                        cell_info["error"] = output_data["error"]
-                    
-                    # Add warning field only if there's a warning
-                    if "warning" in output_data:
-                        cell_info["warning"] = output_data["warning"]
-                        
-                except Exception as e:
-                    cell_info["output"] = [f"[Error reading outputs: {str(e)}]"]
-
-            cells.append(cell_info)
-
-        return cells
+    async def _read_all(notebook):
+        return [_cell_info(i, cell, full_output) for i, cell in enumerate(_snapshot_cells(notebook))]
     
-    return await __safe_notebook_operation(_read_all)
+    return await __with_notebook(_read_all)
 
 
 
@@ -622,61 +757,27 @@ async def read_cell(cell_index: int) -> Dict[str, Any]:
     Returns:
         dict: Cell object with cell_index, cell_id, content, output, images, and conditional error/warning fields
     """
-    async def _read_cell():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-
-        ydoc = server_module.notebook_connection._doc
-
-        if cell_index < 0 or cell_index >= len(ydoc._ycells):
-            raise ValueError(
-                f"Cell index {cell_index} is out of range. Notebook has {len(ydoc._ycells)} cells."
-            )
+    async def _read_cell(notebook):
+        cell, = _snapshot_cells_at(notebook, [cell_index])
+        return _cell_info(cell_index, cell)
+    
+    return await __with_notebook(_read_cell)
 
-        cell = ydoc._ycells[cell_index]
-        
-        # Get cell ID if available
-        cell_id = str(cell.get("id", f"cell-{cell_index}"))
-        
-        # Ensure content is properly serializable
-        content = cell.get("source", "")
-        if hasattr(content, 'to_py'):
-            content = content.to_py()
-        if isinstance(content, list):
-            content = ''.join(str(item) for item in content)
-        else:
-            content = str(content)
-        
-        cell_info = {
-            "cell_index": cell_index,
-            "cell_id": cell_id,
-            "content": content,
-            "output": [],
-            "images": []
-        }
 
-        # Add outputs for code cells with structured image handling and error/warning detection
-        if cell.get("cell_type") == "code":
-            try:
-                outputs = cell.get("outputs", [])
-                output_data = safe_extract_outputs_with_images(outputs)
-                cell_info["output"] = output_data["text_outputs"]
-                cell_info["images"] = output_data["images"]
-                
-                # Add error field only if there's an error
-                if "error" in output_data:
-                    cell_info["error"] = output_data["error"]
-                
-                # Add warning field only if there's a warning
-                if "warning" in output_data:
-                    cell_info["warning"] = output_data["warning"]
-                    
-            except Exception as e:
-                cell_info["output"] = [f"[Error reading outputs: {str(e)}]"]
 
-        return cell_info
+async def read_cells(cell_indices: list[int], full_output: bool = False) -> List[Dict[str, Any]]:
+    """Read several cells from the Jupyter notebook in one call.
+    Args:
+        cell_indices: Indices of the cells to read (0-based), returned in this order
+        full_output: If True, return complete cell outputs without truncation (default False)
+    Returns:
+        List[Dict[str, Any]]: One cell object per index, in the same format as read_cell
+    """
+    async def _read_cells(notebook):
+        cells = _snapshot_cells_at(notebook, cell_indices)
+        return [_cell_info(index, cell, full_output) for index, cell in zip(cell_indices, cells)]
     
-    return await __safe_notebook_operation(_read_cell)
+    return await __with_notebook(_read_cells)
 
 
 
@@ -685,30 +786,32 @@ async def get_notebook_info() -> dict[str, Union[str, int, dict[str, int]]]:
     Returns:
         dict: Notebook information including path, total cells, and cell type counts
     """
-    async def _get_info():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-        
-        if server_module.notebook_connection is None:
-            raise Exception("notebook_connection is None after __ensure_notebook_connection()")
-        
-        ydoc = server_module.notebook_connection._doc
-        total_cells: int = len(ydoc._ycells)
+    cfg = get_config()
 
-        cell_types: dict[str, int] = {}
-        for cell in ydoc._ycells:
-            cell_type: str = str(cell.get("cell_type", "unknown"))
-            cell_types[cell_type] = cell_types.get(cell_type, 0) + 1
+    async def _get_info(notebook):
+        counts = _count_cell_types(notebook)
+        # Types are plain str already; coerce per distinct type, not per cell
+        cell_types: dict[str, int] = {
+            t if type(t) is str else str(t): n for t, n in counts.items()
+        }
+        total_cells: int = sum(cell_types.values())
 
         info: dict[str, Union[str, int, dict[str, int]]] = {
-            "room_id": config.ROOM_ID,
+            "room_id": cfg.ROOM_ID,
             "total_cells": total_cells,
             "cell_types": cell_types,
         }
 
         return info
     
-    return await __safe_notebook_operation(_get_info)
+    room = cfg.ROOM_ID
+    task = _info_inflight.get(room)
+    if task is None:
+        task = asyncio.ensure_future(__with_notebook(_get_info))
+        _info_inflight[room] = task
+        task.add_done_callback(lambda _: _info_inflight.pop(room, None))
+    # Shielded so one caller giving up does not cancel the others' result
+    return await asyncio.shield(task)
 
 
 
@@ -719,35 +822,77 @@ async def delete_cell(cell_index: int) -> str:
     Returns:
         str: Success message
     """
-    async def _delete_cell():
-        # Use persistent connection instead of creating new one
-        await __ensure_notebook_connection()
-
-        ydoc = server_module.notebook_connection._doc
-
-        if cell_index < 0 or cell_index >= len(ydoc._ycells):
+    async def _delete_cell(notebook):
+        # _delete_cells does the bounds check against its single length read
+        result, = await _delete_cells(notebook, [cell_index])
+        if result["status"] == "out_of_range":
             raise ValueError(
-                f"Cell index {cell_index} is out of range. Notebook has {len(ydoc._ycells)} cells."
+                f"Cell index {cell_index} is out of range. Notebook has {result['cell_count']} cells."
             )
+        return f"Cell {cell_index} ({result['cell_type']}) deleted successfully and confirmed."
+    
+    return await __with_notebook(_delete_cell)
 
-        cell_type = ydoc._ycells[cell_index].get("cell_type", "unknown")
 
-        # Get initial count for synchronization verification
-        initial_count = len(ydoc._ycells)
-        expected_count = initial_count - 1
-        
-        # Delete the cell
-        del ydoc._ycells[cell_index]
-        
-        # Wait for confirmation that cell was actually deleted
-        if await __wait_for_cell_count_change(server_module.notebook_connection, expected_count):
-            return f"Cell {cell_index} ({cell_type}) deleted successfully and confirmed."
-        else:
-            raise Exception("Timeout waiting for cell deletion confirmation")
-    
-    return await __safe_notebook_operation(_delete_cell)
+async def _delete_cells(notebook, cell_indices: list[int]) -> list[Dict[str, Any]]:
+    """Delete cells in one Y-doc transaction and wait for the sync to land.
+
+    Indices refer to positions before any deletion. Invalid or repeated
+    indices are reported per item rather than failing the whole batch.
+    """
+    ycells = notebook._doc._ycells
+    results = []
+    to_delete = {}
+    with getattr(notebook, '_lock', None) or contextlib.nullcontext():
+        initial_count = len(ycells)
+        for index in cell_indices:
+            if not 0 <= index < initial_count:
+                results.append({"cell_index": index, "cell_type": None, "status": "out_of_range",
+                                "cell_count": initial_count})
+            elif index in to_delete:
+                results.append({"cell_index": index, "cell_type": to_delete[index], "status": "duplicate"})
+            else:
+                to_delete[index] = str(ycells[index].get("cell_type", "unknown"))
+                results.append({"cell_index": index, "cell_type": to_delete[index], "status": "deleted"})
+
+        # Highest index first so earlier positions stay valid; one
+        # transaction means one update is broadcast to collaborators
+        doc = getattr(ycells, 'doc', None)
+        with doc.transaction() if doc is not None else contextlib.nullcontext():
+            for index in sorted(to_delete, reverse=True):
+                del ycells[index]
+
+    # Wait for confirmation that the cells were actually deleted
+    if to_delete and not await __wait_for_cell_count_change(notebook, initial_count - len(to_delete)):
+        raise Exception("Timeout waiting for cell deletion confirmation")
+    return results
+
+
+async def delete_cells(cell_indices: list[int]) -> list[Dict[str, Any]]:
+    """Delete several cells from the Jupyter notebook in a single update.
+    Args:
+        cell_indices: Indices of the cells to delete (0-based, as numbered before any deletion)
+    Returns:
+        list[dict]: One entry per requested index with cell_index, cell_type and status
+            ("deleted", "out_of_range" or "duplicate")
+    """
+    return await __with_notebook(_delete_cells, cell_indices)
+
+
+
+@lru_cache(maxsize=1024)
+def _format_timestamp(timestamp: str) -> str:
+    """Render a Contents API ISO timestamp for display, or return it unchanged if unparseable."""
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return timestamp
 
 
+def _room_headers(cfg) -> dict[str, str]:
+    """Headers for Jupyter REST calls, authenticated when a room token is set."""
+    return {"Authorization": f"token {cfg.ROOM_TOKEN}"} if cfg.ROOM_TOKEN else {}
+
 
 async def create_notebook(notebook_path: str, initial_content: str = None, switch_to_notebook: bool = True) -> str:
     """Create a new Jupyter notebook at the specified path and optionally switch MCP context to it.
@@ -761,6 +906,7 @@ async def create_notebook(notebook_path: str, initial_content: str = None, switc
         str: Success message with the created notebook path
     """
     async def _create_notebook():
+        cfg = get_config()
         try:
             # Ensure the path ends with .ipynb
             if not notebook_path.endswith('.ipynb'):
@@ -794,14 +940,8 @@ async def create_notebook(notebook_path: str, initial_content: str = None, switc
                 notebook_content["cells"].append(initial_cell)
             
             # Create the notebook using Jupyter Contents API
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                headers = {
-                    "Content-Type": "application/json"
-                }
-                
-                # Add authorization if token is provided
-                if config.ROOM_TOKEN:
-                    headers["Authorization"] = f"token {config.ROOM_TOKEN}"
+            async with __http_client() as client:
+                headers = {"Content-Type": "application/json", **_room_headers(cfg)}
                 
                 # Prepare the request data
                 create_data = {
@@ -812,22 +952,28 @@ async def create_notebook(notebook_path: str, initial_content: str = None, switc
                 
                 # Send PUT request to create the notebook
                 response = await client.put(
-                    f"{config.ROOM_URL}/api/contents/{notebook_path}",
-                    json=create_data,
+                    f"{cfg.ROOM_URL}/api/contents/{notebook_path}",
+                    content=orjson.dumps(create_data),
                     headers=headers
                 )
                 
                 if response.status_code in [200, 201]:
                     result_data = response.json()
                     created_path = result_data.get("path", notebook_path)
+                    # Cached listings no longer include every notebook
+                    _list_cache.clear()
                     
                     # Switch MCP server context to the new notebook if requested
                     if switch_to_notebook:
-                        old_room_id = config.ROOM_ID
-                        config.ROOM_ID = created_path
+                        old_room_id = cfg.ROOM_ID
+                        # Switch context and restart the notebook connection for the new notebook
+                        cfg = await __switch_room(created_path)
                         logger.info(f"MCP server context switched from '{old_room_id}' to '{created_path}'")
-                        # Restart notebook connection for new notebook
-                        await __start_notebook_connection()
+                        
+                        # Complete URL with token, shared by the session and fallback messages
+                        notebook_url = f"{cfg.ROOM_URL}/lab/tree/{created_path}"
+                        if cfg.ROOM_TOKEN:
+                            notebook_url += f"?token={cfg.ROOM_TOKEN}"
                         
                         # Try to create a session for the new notebook to "warm it up"
                         try:
@@ -839,8 +985,8 @@ async def create_notebook(notebook_path: str, initial_content: str = None, switc
                             }
                             
                             session_response = await client.post(
-                                f"{config.ROOM_URL}/api/sessions",
-                                json=session_data,
+                                f"{cfg.ROOM_URL}/api/sessions",
+                                content=orjson.dumps(session_data),
                                 headers=headers
                             )
                             
@@ -848,24 +994,13 @@ async def create_notebook(notebook_path: str, initial_content: str = None, switc
                                 logger.info(f"Session created for notebook: {created_path}")
                                 session_info = session_response.json()
                                 kernel_id = session_info.get("kernel", {}).get("id", "unknown")
-                                # Generate the complete URL with token
-                                if config.ROOM_TOKEN:
-                                    notebook_url = f"{config.ROOM_URL}/lab/tree/{created_path}?token={config.ROOM_TOKEN}"
-                                else:
-                                    notebook_url = f"{config.ROOM_URL}/lab/tree/{created_path}"
                                 
                                 return f"Notebook created at: {created_path}. MCP context switched. Session & kernel ({kernel_id[:8]}...) started. ⚠️  OPEN: {notebook_url}"
                             else:
-                                logger.warning(f"Failed to create session: {session_response.status_code}")
+                                logger.warning("Failed to create session: %s", session_response.status_code)
                                 
                         except Exception as e:
-                            logger.warning(f"Could not create session: {e}")
-                        
-                        # Generate the complete URL with token for fallback
-                        if config.ROOM_TOKEN:
-                            notebook_url = f"{config.ROOM_URL}/lab/tree/{created_path}?token={config.ROOM_TOKEN}"
-                        else:
-                            notebook_url = f"{config.ROOM_URL}/lab/tree/{created_path}"
+                            logger.warning("Could not create session: %s", e)
                         
                         return f"Notebook created at: {created_path}. MCP server context switched to new notebook. ⚠️  IMPORTANT: Open this URL in your browser to establish collaboration: {notebook_url}"
                     else:
@@ -888,6 +1023,26 @@ async def create_notebook(notebook_path: str, initial_content: str = None, switc
 
 
 
+# Reply templates for switch_notebook, filled with str.format_map
+_SWITCH_RESET_TMPL = """MCP context switched to: {notebook_path}
+
+🎯 **COMPLETE TAB MANAGEMENT**: Open this URL to close all other tabs and focus on this notebook:
+{switch_url}
+
+This URL will:
+• ✅ Close ALL currently open notebook tabs
+• ✅ Open ONLY the target notebook: {notebook_path}  
+• ✅ Focus the browser on the new notebook
+• ✅ Establish real-time MCP collaboration session"""
+
+_SWITCH_OPEN_TMPL = """MCP context switched to: {notebook_path}
+
+🔗 **OPEN NOTEBOOK**: Use this URL to open the notebook (keeps other tabs open):
+{switch_url}
+
+This will establish real-time MCP collaboration with the target notebook."""
+
+
 async def switch_notebook(notebook_path: str, close_other_tabs: bool = True) -> str:
     """Switch the MCP server context to a different existing notebook and optionally manage browser tabs.
     
@@ -898,18 +1053,17 @@ async def switch_notebook(notebook_path: str, close_other_tabs: bool = True) ->
     Returns:
         str: Success message with URL for browser tab management
     """
+    cfg = get_config()
     try:
         if not notebook_path.endswith('.ipynb'):
             raise ValueError("Notebook path must end with '.ipynb'")
         
         # First verify the notebook exists
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {}
-            if config.ROOM_TOKEN:
-                headers["Authorization"] = f"token {config.ROOM_TOKEN}"
+        async with __http_client() as client:
+            headers = _room_headers(cfg)
             
             response = await client.get(
-                f"{config.ROOM_URL}/api/contents/{notebook_path}",
+                f"{cfg.ROOM_URL}/api/contents/{notebook_path}",
                 headers=headers
             )
             
@@ -917,17 +1071,17 @@ async def switch_notebook(notebook_path: str, close_other_tabs: bool = True) ->
                 content_data = response.json()
                 if content_data.get("type") == "notebook":
                     # Switch MCP context
-                    old_room_id = config.ROOM_ID
-                    config.ROOM_ID = notebook_path
+                    old_room_id = cfg.ROOM_ID
+                    # Switch context and restart the notebook connection for the new notebook
+                    cfg = await __switch_room(notebook_path)
+                    _list_cache.clear()
                     logger.info(f"MCP server context switched from '{old_room_id}' to '{notebook_path}'")
-                    # Restart notebook connection for new notebook
-                    await __start_notebook_connection()
                     
                     # Generate URLs for different switching behaviors
-                    base_url = f"{config.ROOM_URL}/lab/tree/{notebook_path}"
+                    base_url = f"{cfg.ROOM_URL}/lab/tree/{notebook_path}"
                     
-                    if config.ROOM_TOKEN:
-                        token_param = f"token={config.ROOM_TOKEN}"
+                    if cfg.ROOM_TOKEN:
+                        token_param = f"token={cfg.ROOM_TOKEN}"
                     else:
                         token_param = ""
                     
@@ -938,16 +1092,7 @@ async def switch_notebook(notebook_path: str, close_other_tabs: bool = True) ->
                         else:
                             switch_url = f"{base_url}?reset"
                         
-                        message = f"""MCP context switched to: {notebook_path}
-
-🎯 **COMPLETE TAB MANAGEMENT**: Open this URL to close all other tabs and focus on this notebook:
-{switch_url}
-
-This URL will:
-• ✅ Close ALL currently open notebook tabs
-• ✅ Open ONLY the target notebook: {notebook_path}  
-• ✅ Focus the browser on the new notebook
-• ✅ Establish real-time MCP collaboration session"""
+                        template = _SWITCH_RESET_TMPL
                         
                     else:
                         # Regular URL without closing other tabs
@@ -956,14 +1101,9 @@ This URL will:
                         else:
                             switch_url = base_url
                         
-                        message = f"""MCP context switched to: {notebook_path}
-
-🔗 **OPEN NOTEBOOK**: Use this URL to open the notebook (keeps other tabs open):
-{switch_url}
-
-This will establish real-time MCP collaboration with the target notebook."""
+                        template = _SWITCH_OPEN_TMPL
                     
-                    return message
+                    return template.format_map({"notebook_path": notebook_path, "switch_url": switch_url})
                     
                 else:
                     raise Exception(f"'{notebook_path}' is not a notebook file")
@@ -978,90 +1118,150 @@ This will establish real-time MCP collaboration with the target notebook."""
 
 
 
-async def list_notebooks(directory_path: str = "", include_subdirectories: bool = True, max_depth: int = 3) -> Dict[str, Any]:
+async def list_notebooks(directory_path: str = "", include_subdirectories: bool = True, max_depth: int = 3, limit: int | None = None) -> Dict[str, Any]:
     """List all notebooks in the Jupyter workspace with metadata and paths.
     
     Args:
         directory_path: Specific directory to search (empty for root)
         include_subdirectories: Whether to search subdirectories
         max_depth: Maximum directory depth to search
+        limit: Return only the most recently modified notebooks, at most this many (default: all).
+            This caps the output only: the whole tree is still scanned, since the newest
+            notebooks can be anywhere in it, and total_found counts every match
         
     Returns:
-        dict: Dictionary with notebook list and metadata
+        dict: Dictionary with notebook list and metadata, newest first with ties ordered
+            by path. Directories that could not be listed are reported in
+            failed_directories. Results are cached for a few seconds, so notebooks added
+            or removed outside this server may show up late
     """
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be zero or a positive integer, got {limit}")
+    
+    cfg = get_config()
+    # The room id and token are in the key because they shape each entry
+    cache_key = (cfg.ROOM_URL, cfg.ROOM_TOKEN, cfg.ROOM_ID, directory_path, include_subdirectories, max_depth, limit)
+    cached = _list_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < _LIST_CACHE_TTL:
+        return copy.deepcopy(cached[1])
+    
+    headers = _room_headers(cfg)
     try:
-        notebooks = []
         directories_scanned = []
+        failed_directories = []
         
-        async def _scan_directory(path: str, current_depth: int = 0) -> None:
-            if current_depth > max_depth:
-                return
-                
+        # Bound concurrent directory requests so wide trees do not flood the server
+        scan_limit = asyncio.Semaphore(16)
+        
+        # Per-call constants for notebook URLs, built once instead of per item
+        lab_prefix = f"{cfg.ROOM_URL}/lab/tree/"
+        token_suffix = f"?token={cfg.ROOM_TOKEN}" if cfg.ROOM_TOKEN else ""
+        
+        async def _scan_directory(path: str, current_depth: int) -> tuple[list, list, int]:
+            """Fetch one directory; return its notebooks, subdirectories and depth."""
+            found = []
+            subdirectories = []
             try:
                 directories_scanned.append(path)
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    headers = {}
-                    if config.ROOM_TOKEN:
-                        headers["Authorization"] = f"token {config.ROOM_TOKEN}"
-                    
+                async with scan_limit, __http_client() as client:
                     # Get directory contents
-                    url = f"{config.ROOM_URL}/api/contents/{path}" if path else f"{config.ROOM_URL}/api/contents"
+                    url = f"{cfg.ROOM_URL}/api/contents/{path}" if path else f"{cfg.ROOM_URL}/api/contents"
                     response = await client.get(url, headers=headers)
                     
-                    if response.status_code == 200:
-                        content_data = response.json()
-                        content_list = content_data.get("content", [])
-                        
-                        if isinstance(content_list, list):
-                            for item in content_list:
-                                if item.get("type") == "notebook" and item.get("name", "").endswith(".ipynb"):
-                                    # Found a notebook
-                                    notebook_info = {
-                                        "name": item.get("name"),
-                                        "path": item.get("path"),
-                                        "created": item.get("created"),
-                                        "last_modified": item.get("last_modified"),
-                                        "size": item.get("size"),
-                                        "writable": item.get("writable", True),
-                                        "url": f"{config.ROOM_URL}/lab/tree/{item.get('path')}"
-                                    }
-                                    
-                                    # Add token to URL if available
-                                    if config.ROOM_TOKEN:
-                                        notebook_info["url"] += f"?token={config.ROOM_TOKEN}"
-                                    
-                                    # Check if this is the current MCP notebook
-                                    notebook_info["is_current_mcp_context"] = (item.get("path") == config.ROOM_ID)
-                                    
-                                    notebooks.append(notebook_info)
-                                    
-                                elif item.get("type") == "directory" and include_subdirectories:
-                                    # Recursively scan subdirectory
-                                    await _scan_directory(item.get("path", ""), current_depth + 1)
-                                    
+                if response.status_code != 200:
+                    raise Exception(f"HTTP {response.status_code}")
+                
+                content_data = orjson.loads(response.content)
+                content_list = content_data.get("content", [])
+                
+                if isinstance(content_list, list):
+                    for item in content_list:
+                        item_type = item.get("type")
+                        if item_type == "notebook" and item.get("name", "").endswith(".ipynb"):
+                            # Found a notebook
+                            item_path = item.get("path")
+                            found.append({
+                                "name": item.get("name"),
+                                "path": item_path,
+                                "created": item.get("created"),
+                                "last_modified": item.get("last_modified"),
+                                "size": item.get("size"),
+                                "writable": item.get("writable", True),
+                                "url": f"{lab_prefix}{item_path}{token_suffix}",
+                                # Check if this is the current MCP notebook
+                                "is_current_mcp_context": item_path == cfg.ROOM_ID,
+                            })
+                            
+                        elif item_type == "directory" and include_subdirectories and current_depth < max_depth:
+                            subdirectories.append(item.get("path", ""))
+                                
             except Exception as e:
-                logger.warning(f"Error scanning directory '{path}': {e}")
+                logger.warning("Error scanning directory '%s': %s", path, e)
+                failed_directories.append({"path": path, "error": str(e)})
+            
+            return found, subdirectories, current_depth
         
-        # Start scanning from the specified directory
-        await _scan_directory(directory_path)
+        async def _iter_notebooks():
+            """Yield notebooks as each directory listing arrives, whichever finishes first."""
+            pending = {asyncio.ensure_future(_scan_directory(directory_path, 0))} if max_depth >= 0 else set()
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        found, subdirectories, depth = task.result()
+                        for child in subdirectories:
+                            pending.add(asyncio.ensure_future(_scan_directory(child, depth + 1)))
+                        for notebook_info in found:
+                            yield notebook_info
+            finally:
+                for task in pending:
+                    task.cancel()
         
-        # Sort notebooks by last modified (newest first)
-        notebooks.sort(key=lambda x: x.get("last_modified", ""), reverse=True)
+        # Sort notebooks by last modified (newest first), then by path, so the
+        # order does not depend on which directory listing arrived first. With
+        # a limit, only the newest ``limit`` entries are held while the tree is walked.
+        total_found = 0
+        if limit is None:
+            notebooks = []
+            async for notebook_info in _iter_notebooks():
+                notebooks.append(notebook_info)
+            total_found = len(notebooks)
+            notebooks.sort(key=lambda x: (x.get("last_modified") or "", x["path"] or ""), reverse=True)
+        else:
+            newest = []
+            async for notebook_info in _iter_notebooks():
+                # Paths are unique, so entries never fall through to the dicts
+                entry = (notebook_info.get("last_modified") or "", notebook_info["path"] or "", notebook_info)
+                total_found += 1
+                if len(newest) < limit:
+                    heapq.heappush(newest, entry)
+                elif limit and entry[:2] > newest[0][:2]:
+                    heapq.heapreplace(newest, entry)
+            notebooks = [notebook_info for _, _, notebook_info in sorted(newest, reverse=True)]
         
         result = {
             "notebooks": notebooks,
-            "total_found": len(notebooks),
-            "current_mcp_context": config.ROOM_ID,
-            "directories_scanned": directories_scanned,
+            "total_found": total_found,
+            "current_mcp_context": cfg.ROOM_ID,
+            "directories_scanned": sorted(directories_scanned),
+            "failed_directories": sorted(failed_directories, key=lambda d: d["path"]),
             "search_params": {
                 "directory_path": directory_path or "root",
                 "include_subdirectories": include_subdirectories,
-                "max_depth": max_depth
+                "max_depth": max_depth,
+                "limit": limit
             }
         }
         
-        logger.info(f"Found {len(notebooks)} notebooks in workspace")
+        logger.info(f"Found {total_found} notebooks in workspace")
+        now = time.monotonic()
+        # Drop expired listings so varied arguments cannot grow the cache
+        for key in [key for key, (stored, _) in _list_cache.items() if now - stored >= _LIST_CACHE_TTL]:
+            del _list_cache[key]
+        # A partial listing is returned but not cached, so the next call rescans
+        if not failed_directories:
+            _list_cache[cache_key] = (now, copy.deepcopy(result))
         return result
         
     except Exception as e:
@@ -1076,105 +1276,118 @@ async def list_open_notebooks() -> Dict[str, Any]:
     Returns:
         dict: Information about open notebooks and workspace state
     """
+    cfg = get_config()
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {}
-            if config.ROOM_TOKEN:
-                headers["Authorization"] = f"token {config.ROOM_TOKEN}"
+        async with __http_client() as client:
+            headers = _room_headers(cfg)
             
-            # Get current workspace data to see what's open
-            response = await client.get(
-                f"{config.ROOM_URL}/lab/api/workspaces/",
-                headers=headers
+            # The workspace listing and the default workspace are independent
+            # requests, so issue them together rather than one after the other.
+            # Only the listing is required; the default workspace is best-effort
+            response, default_response = await asyncio.gather(
+                client.get(f"{cfg.ROOM_URL}/lab/api/workspaces/", headers=headers),
+                client.get(f"{cfg.ROOM_URL}/lab/api/workspaces/lab", headers=headers),
+                return_exceptions=True,
             )
             
-            if response.status_code == 200:
-                workspaces_data = response.json()
+            if isinstance(response, BaseException):
+                raise response
+            if response.status_code != 200:
+                raise Exception(f"Failed to access workspaces API: HTTP {response.status_code}")
+            
+            workspaces_data = response.json()
+            
+            open_notebooks = []
+            workspace_info = {}
+            seen_paths = set()
+            
+            # Process workspaces to find open notebooks, including named ones
+            # such as the mcp-focused-* workspaces from prepare_notebook
+            if "workspaces" in workspaces_data:
+                workspaces = workspaces_data["workspaces"]
                 
-                open_notebooks = []
-                workspace_info = {}
+                # Check the default workspace and named workspaces
+                all_workspaces = workspaces.get("values", [])
                 
-                # Process workspaces to find open notebooks
-                if "workspaces" in workspaces_data:
-                    workspaces = workspaces_data["workspaces"]
-                    
-                    # Check the default workspace and named workspaces
-                    all_workspaces = workspaces.get("values", [])
+                for workspace in all_workspaces:
+                    workspace_id = workspace.get("metadata", {}).get("id", "unknown")
+                    workspace_data = workspace.get("data", {})
                     
-                    for workspace in all_workspaces:
-                        workspace_id = workspace.get("metadata", {}).get("id", "unknown")
-                        workspace_data = workspace.get("data", {})
-                        
-                        # Look for notebook-related entries in the workspace data
-                        notebook_entries = []
-                        for key, value in workspace_data.items():
-                            # Look for docmanager entries (open documents)
-                            if "docmanager" in key.lower() or "notebook" in key.lower():
-                                if isinstance(value, dict) and "data" in value:
-                                    data = value["data"]
-                                    if isinstance(data, dict) and "path" in data:
-                                        path = data["path"]
-                                        if path.endswith(".ipynb"):
-                                            notebook_entries.append({
-                                                "path": path,
-                                                "factory": data.get("factory", "unknown"),
-                                                "workspace_key": key
-                                            })
-                        
-                        if notebook_entries:
-                            workspace_info[workspace_id] = {
-                                "open_notebooks": notebook_entries,
-                                "total_open": len(notebook_entries)
-                            }
-                            open_notebooks.extend(notebook_entries)
-                
-                # Also get the default workspace specifically
-                try:
-                    default_response = await client.get(
-                        f"{config.ROOM_URL}/lab/api/workspaces/lab",
-                        headers=headers
-                    )
-                    if default_response.status_code == 200:
-                        default_data = default_response.json()
-                        workspace_data = default_data.get("data", {})
-                        
-                        for key, value in workspace_data.items():
+                    # Look for notebook-related entries in the workspace data
+                    notebook_entries = []
+                    for key, value in workspace_data.items():
+                        # Look for docmanager entries (open documents)
+                        key_lower = key.lower()
+                        if "docmanager" in key_lower or "notebook" in key_lower:
                             if isinstance(value, dict) and "data" in value:
                                 data = value["data"]
                                 if isinstance(data, dict) and "path" in data:
                                     path = data["path"]
                                     if path.endswith(".ipynb"):
-                                        # Avoid duplicates
-                                        if not any(nb["path"] == path for nb in open_notebooks):
-                                            open_notebooks.append({
-                                                "path": path,
-                                                "factory": data.get("factory", "unknown"),
-                                                "workspace_key": key,
-                                                "workspace": "default"
-                                            })
-                except:
-                    pass  # Default workspace might not exist
-                
-                result = {
-                    "open_notebooks": open_notebooks,
-                    "total_open": len(open_notebooks),
-                    "current_mcp_context": config.ROOM_ID,
-                    "workspace_info": workspace_info,
-                    "api_status": "success"
-                }
-                
-                logger.info(f"Found {len(open_notebooks)} open notebooks in JupyterLab interface")
-                return result
+                                        notebook_entries.append({
+                                            "path": path,
+                                            "factory": data.get("factory", "unknown"),
+                                            "workspace_key": key
+                                        })
+                    
+                    if notebook_entries:
+                        workspace_info[workspace_id] = {
+                            "open_notebooks": notebook_entries,
+                            "total_open": len(notebook_entries)
+                        }
+                        # A notebook open in several workspaces is listed once
+                        for entry in notebook_entries:
+                            if entry["path"] not in seen_paths:
+                                seen_paths.add(entry["path"])
+                                open_notebooks.append(entry)
+            
+            # Default workspace might not exist or be unreachable
+            default_data = None
+            if isinstance(default_response, Exception):
+                logger.debug("Could not fetch default workspace: %s", default_response)
+            elif isinstance(default_response, BaseException):
+                raise default_response
+            elif default_response.status_code == 200:
+                try:
+                    default_data = default_response.json()
+                except ValueError as e:
+                    logger.debug("Could not decode default workspace: %s", e)
+            
+            if isinstance(default_data, dict):
+                workspace_data = default_data.get("data", {})
                 
-            else:
-                raise Exception(f"Failed to access workspaces API: HTTP {response.status_code}")
+                for key, value in workspace_data.items():
+                    if isinstance(value, dict) and "data" in value:
+                        data = value["data"]
+                        if isinstance(data, dict) and "path" in data:
+                            path = data["path"]
+                            # Avoid duplicates
+                            if path.endswith(".ipynb") and path not in seen_paths:
+                                seen_paths.add(path)
+                                open_notebooks.append({
+                                    "path": path,
+                                    "factory": data.get("factory", "unknown"),
+                                    "workspace_key": key,
+                                    "workspace": "default"
+                                })
+            
+            result = {
+                "open_notebooks": open_notebooks,
+                "total_open": len(open_notebooks),
+                "current_mcp_context": cfg.ROOM_ID,
+                "workspace_info": workspace_info,
+                "api_status": "success"
+            }
+            
+            logger.info(f"Found {len(open_notebooks)} open notebooks in JupyterLab interface")
+            return result
                 
     except Exception as e:
         logger.error(f"Error listing open notebooks: {e}")
         return {
             "open_notebooks": [],
             "total_open": 0,
-            "current_mcp_context": config.ROOM_ID,
+            "current_mcp_context": cfg.ROOM_ID,
             "workspace_info": {},
             "api_status": "error",
             "error_message": str(e)
@@ -1182,6 +1395,53 @@ async def list_open_notebooks() -> Dict[str, Any]:
 
 
 
+# Reply templates for prepare_notebook, filled with str.format_map
+_PREPARE_SUCCESS_TMPL = """🎯 **NOTEBOOK PREPARATION COMPLETE**
+
+📋 **Notebook Details**:
+   • Path: {notebook_path}
+   • Size: {size_kb}KB
+   • Modified: {last_modified}
+   • Status: ✅ Found and accessible
+
+⚡ **MCP Setup**:
+   • Context: {context_status} '{notebook_path}'
+   {previous_line}
+   • Status: ✅ Ready for real-time collaboration
+
+🎯 **FOCUSED WORKSPACE CREATED**:
+   Click this URL to open ONLY the target notebook in a clean workspace:
+   
+   {focused_url}
+   
+   This focused workspace will:
+   • 🗂️  Open ONLY the target notebook (no other tabs)
+   • 🎯 Provide a clean, distraction-free environment
+   • ⚡ Establish MCP collaboration session immediately
+   • 💾 Save your focused workspace state automatically
+   
+✅ **Ready!** Your notebook is prepared for focused MCP-powered work.
+
+💡 **Pro Tip**: Bookmark the focused workspace URL for quick access!"""
+
+_PREPARE_FALLBACK_TMPL = """🎯 **NOTEBOOK PREPARATION COMPLETE** (Fallback Mode)
+
+📋 **Notebook Details**:
+   • Path: {notebook_path}
+   • Size: {size_kb}KB
+   • Modified: {last_modified}
+   • Status: ✅ Found and accessible
+
+⚡ **MCP Setup**:
+   • Context: {context_status} '{notebook_path}'
+   • Status: ✅ Ready for real-time collaboration
+
+🔗 **NOTEBOOK URL**:
+   {fallback_url}
+   
+⚠️  Note: Focused workspace creation failed, using standard URL instead."""
+
+
 async def prepare_notebook(notebook_path: str) -> str:
     """Prepare a notebook for MCP collaboration by handling all setup automatically.
     
@@ -1198,16 +1458,15 @@ async def prepare_notebook(notebook_path: str) -> str:
     Returns:
         str: Complete preparation status and browser URL for focused notebook work
     """
-    # Configuration will be updated as needed
+    # Read once; replaced below if the context switches
+    cfg = get_config()
     
     try:
         # Check if notebook exists
-        async with httpx.AsyncClient() as client:
+        async with __http_client() as client:
             # Build the Contents API URL
-            contents_url = f"{config.ROOM_URL}/api/contents/{notebook_path}"
-            headers = {}
-            if config.ROOM_TOKEN:
-                headers["Authorization"] = f"token {config.ROOM_TOKEN}"
+            contents_url = f"{cfg.ROOM_URL}/api/contents/{notebook_path}"
+            headers = _room_headers(cfg)
             
             # Check if the notebook exists
             response = await client.get(contents_url, headers=headers)
@@ -1219,23 +1478,16 @@ async def prepare_notebook(notebook_path: str) -> str:
             # Get notebook metadata
             notebook_info = response.json()
             size_kb = round(notebook_info.get('size', 0) / 1024, 1)
-            last_modified = notebook_info.get('last_modified', 'Unknown')
-            if last_modified != 'Unknown':
-                # Parse and format the timestamp
-                try:
-                    dt = datetime.fromisoformat(last_modified.replace('Z', '+00:00'))
-                    last_modified = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    pass
+            last_modified = _format_timestamp(notebook_info.get('last_modified', 'Unknown'))
             
             # Update MCP context if needed
             context_switched = False
-            if config.ROOM_ID != notebook_path:
-                old_context = config.ROOM_ID
-                config.ROOM_ID = notebook_path
+            if cfg.ROOM_ID != notebook_path:
+                old_context = cfg.ROOM_ID
+                # Switch context and restart the notebook connection for the new notebook
+                cfg = await __switch_room(notebook_path)
+                _list_cache.clear()
                 context_switched = True
-                # Restart notebook connection for new notebook
-                await __start_notebook_connection()
             else:
                 old_context = "same"
             
@@ -1257,73 +1509,45 @@ async def prepare_notebook(notebook_path: str) -> str:
             }
             
             # Save the focused workspace
-            workspace_url = f"{config.ROOM_URL}/lab/api/workspaces/{workspace_name}"
+            workspace_url = f"{cfg.ROOM_URL}/lab/api/workspaces/{workspace_name}"
             workspace_response = await client.put(
                 workspace_url, 
-                headers=headers,
-                json=workspace_data
+                headers={"Content-Type": "application/json", **headers},
+                content=orjson.dumps(workspace_data)
             )
             
             if workspace_response.status_code in [204, 200]:
                 # Generate the focused workspace URL
-                token_param = f"token={config.ROOM_TOKEN}" if config.ROOM_TOKEN else ""
+                token_param = f"token={cfg.ROOM_TOKEN}" if cfg.ROOM_TOKEN else ""
                 if token_param:
-                    focused_url = f"{config.ROOM_URL}/lab/workspaces/{workspace_name}?{token_param}"
+                    focused_url = f"{cfg.ROOM_URL}/lab/workspaces/{workspace_name}?{token_param}"
                 else:
-                    focused_url = f"{config.ROOM_URL}/lab/workspaces/{workspace_name}"
+                    focused_url = f"{cfg.ROOM_URL}/lab/workspaces/{workspace_name}"
                 
                 # Prepare the success message
-                result_message = f"""🎯 **NOTEBOOK PREPARATION COMPLETE**
-
-📋 **Notebook Details**:
-   • Path: {notebook_path}
-   • Size: {size_kb}KB
-   • Modified: {last_modified}
-   • Status: ✅ Found and accessible
-
-⚡ **MCP Setup**:
-   • Context: {'✅ Switched to' if context_switched else '✅ Already set to'} '{notebook_path}'
-   {f'• Previous: {old_context}' if context_switched and old_context != 'same' else ''}
-   • Status: ✅ Ready for real-time collaboration
-
-🎯 **FOCUSED WORKSPACE CREATED**:
-   Click this URL to open ONLY the target notebook in a clean workspace:
-   
-   {focused_url}
-   
-   This focused workspace will:
-   • 🗂️  Open ONLY the target notebook (no other tabs)
-   • 🎯 Provide a clean, distraction-free environment
-   • ⚡ Establish MCP collaboration session immediately
-   • 💾 Save your focused workspace state automatically
-   
-✅ **Ready!** Your notebook is prepared for focused MCP-powered work.
-
-💡 **Pro Tip**: Bookmark the focused workspace URL for quick access!"""
+                result_message = _PREPARE_SUCCESS_TMPL.format_map({
+                    "notebook_path": notebook_path,
+                    "size_kb": size_kb,
+                    "last_modified": last_modified,
+                    "context_status": "✅ Switched to" if context_switched else "✅ Already set to",
+                    "previous_line": f"• Previous: {old_context}" if context_switched and old_context != "same" else "",
+                    "focused_url": focused_url,
+                })
                 
                 return result_message
             else:
                 # Fallback to regular URL if workspace creation fails
-                logger.warning(f"Failed to create focused workspace: {workspace_response.status_code}")
-                token_param = f"token={config.ROOM_TOKEN}" if config.ROOM_TOKEN else ""
-                fallback_url = f"{config.ROOM_URL}/lab/tree/{notebook_path}?{token_param}" if token_param else f"{config.ROOM_URL}/lab/tree/{notebook_path}"
+                logger.warning("Failed to create focused workspace: %s", workspace_response.status_code)
+                token_param = f"token={cfg.ROOM_TOKEN}" if cfg.ROOM_TOKEN else ""
+                fallback_url = f"{cfg.ROOM_URL}/lab/tree/{notebook_path}?{token_param}" if token_param else f"{cfg.ROOM_URL}/lab/tree/{notebook_path}"
                 
-                return f"""🎯 **NOTEBOOK PREPARATION COMPLETE** (Fallback Mode)
-
-📋 **Notebook Details**:
-   • Path: {notebook_path}
-   • Size: {size_kb}KB
-   • Modified: {last_modified}
-   • Status: ✅ Found and accessible
-
-⚡ **MCP Setup**:
-   • Context: {'✅ Switched to' if context_switched else '✅ Already set to'} '{notebook_path}'
-   • Status: ✅ Ready for real-time collaboration
-
-🔗 **NOTEBOOK URL**:
-   {fallback_url}
-   
-⚠️  Note: Focused workspace creation failed, using standard URL instead."""
+                return _PREPARE_FALLBACK_TMPL.format_map({
+                    "notebook_path": notebook_path,
+                    "size_kb": size_kb,
+                    "last_modified": last_modified,
+                    "context_status": "✅ Switched to" if context_switched else "✅ Already set to",
+                    "fallback_url": fallback_url,
+                })
                 
     except Exception as e:
         logger.error(f"Error in prepare_notebook: {e}")
@@ -639,6 +639,9 @@ def safe_extract_outputs_with_images(outputs: Any, full_output: bool = False) ->
     
     text_outputs = []
     images = []
+    # Untruncated text of each output, kept for error/warning detection so
+    # the outputs are not extracted a second time
+    all_output_text = []
     
     # Handle CRDT YArray
     if hasattr(outputs, '__iter__') and not isinstance(outputs, (str, dict)):
@@ -652,6 +655,7 @@ def safe_extract_outputs_with_images(outputs: Any, full_output: bool = False) ->
                 # Always get text representation (will be clean due to image suppression)
                 extracted = extract_output(output)
                 if extracted:
+                    all_output_text.append(extracted)
                     truncated = truncate_output(extracted, full_output)
                     text_outputs.append(truncated)
         except Exception as e:
@@ -664,11 +668,14 @@ def safe_extract_outputs_with_images(outputs: Any, full_output: bool = False) ->
             
         extracted = extract_output(outputs)
         if extracted:
+            all_output_text.append(extracted)
             truncated = truncate_output(extracted, full_output)
             text_outputs.append(truncated)
     
-    # Extract error and warning information
-    error_warning_info = extract_error_and_warning_info(outputs)
+    # Extract error and warning information, as extract_error_and_warning_info would
+    combined_text = '\n'.join(all_output_text)
+    error_info = detect_error_in_output(combined_text)
+    warning_info = detect_warning_in_output(combined_text)
     
     result = {
         "text_outputs": text_outputs,
@@ -676,12 +683,12 @@ def safe_extract_outputs_with_images(outputs: Any, full_output: bool = False) ->
     }
     
     # Only include error field if there's an error
-    if error_warning_info["error"]:
-        result["error"] = error_warning_info["error"]
+    if error_info:
+        result["error"] = error_info
     
     # Only include warning field if there's a warning  
-    if error_warning_info["warning"]:
-        result["warning"] = error_warning_info["warning"]
+    if warning_info:
+        result["warning"] = warning_info
     
     return result
 
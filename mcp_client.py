@@ -8,9 +8,14 @@ all MCP tools.
 """
 
 import asyncio
+import concurrent.futures
 import httpx
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+# Worker threads for call_tool_sync when the caller already runs an event
+# loop; shared so each call does not start and tear down its own pool
+_SYNC_POOL = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="mcp-client-sync")
 
 
 class MCPClient:
@@ -128,6 +133,19 @@ class MCPClient:
             except httpx.HTTPStatusError as e:
                 raise Exception(f"HTTP error {e.response.status_code}: {e.response.text}")
     
+    def call_tool_sync(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Blocking variant of call_tool for scripts and Jupyter cells
+        
+        When an event loop is already running (e.g. inside Jupyter), the call
+        runs on a worker thread with its own loop instead of nesting loops.
+        """
+        coro = self.call_tool(tool_name, arguments)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        return _SYNC_POOL.submit(asyncio.run, coro).result()
+    
     async def list_tools(self) -> List[Dict[str, Any]]:
         """List available MCP tools"""
         payload = {
@@ -204,6 +222,24 @@ class MCPClient:
         """
         return await self.call_tool("read_cell", {"cell_index": cell_index})
     
+    async def read_cells(self, cell_indices: List[int], full_output: bool = False) -> List[Dict[str, Any]]:
+        """Read several cells in one call
+        
+        Args:
+            cell_indices: Indices of the cells to read (0-based), returned in this order
+            full_output: If True, return complete cell outputs without truncation (default False)
+            
+        Returns:
+            List[Dict[str, Any]]: One cell object per index with conditional error/warning fields
+        """
+        result = await self.call_tool("read_cells", {"cell_indices": cell_indices, "full_output": full_output})
+        if isinstance(result, dict) and "result" in result:
+            return result["result"]
+        elif isinstance(result, list):
+            return result
+        else:
+            return [result] if result else []
+    
     async def append_markdown_cell(self, cell_source: str) -> str:
         """Add a markdown cell to the end of the notebook"""
         result = await self.call_tool("append_markdown_cell", {"cell_source": cell_source})
@@ -277,18 +313,21 @@ class MCPClient:
         else:
             return [result]
     
-    async def execute_cell_simple_timeout(self, cell_index: int, timeout_seconds: int = 300, full_output: bool = False) -> List[str]:
+    async def execute_cell_simple_timeout(self, cell_index: int, timeout_seconds: int = 300, full_output: bool = False,
+                                          skip_if_unchanged: bool = False) -> List[str]:
         """Execute a cell with simple timeout
         
         Args:
             cell_index: Index of cell to execute
             timeout_seconds: Maximum execution time
             full_output: If True, return complete execution outputs without truncation (default False)
+            skip_if_unchanged: If True, reuse the outputs of an unchanged cell that already ran without error
         """
         result = await self.call_tool("execute_cell_simple_timeout", {
             "cell_index": cell_index,
             "timeout_seconds": timeout_seconds,
-            "full_output": full_output
+            "full_output": full_output,
+            "skip_if_unchanged": skip_if_unchanged
         })
         if isinstance(result, dict) and "result" in result:
             return result["result"]
@@ -338,6 +377,23 @@ class MCPClient:
         else:
             return str(result)
     
+    async def delete_cells(self, cell_indices: List[int]) -> List[Dict[str, Any]]:
+        """Delete several cells in one notebook update
+        
+        Args:
+            cell_indices: Indices of the cells to delete (0-based, as numbered before any deletion)
+            
+        Returns:
+            List[Dict[str, Any]]: One entry per index with cell_index, cell_type and status
+        """
+        result = await self.call_tool("delete_cells", {"cell_indices": cell_indices})
+        if isinstance(result, dict) and "result" in result:
+            return result["result"]
+        elif isinstance(result, list):
+            return result
+        else:
+            return [result] if result else []
+    
     async def create_notebook(self, notebook_path: str, initial_content: str = None, switch_to_notebook: bool = True) -> str:
         """Create a new Jupyter notebook at the specified path
         
@@ -411,13 +467,15 @@ class MCPClient:
         else:
             return [str(result)]
 
-    async def list_notebooks(self, directory_path: str = "", include_subdirectories: bool = True, max_depth: int = 3) -> Dict[str, Any]:
+    async def list_notebooks(self, directory_path: str = "", include_subdirectories: bool = True, max_depth: int = 3, limit: Optional[int] = None) -> Dict[str, Any]:
         """List all notebooks in the Jupyter workspace with metadata"""
         arguments = {
             "directory_path": directory_path,
             "include_subdirectories": include_subdirectories,
             "max_depth": max_depth
         }
+        if limit is not None:
+            arguments["limit"] = limit
         result = await self.call_tool("list_notebooks", arguments)
         if isinstance(result, dict) and "result" in result:
             return result["result"]
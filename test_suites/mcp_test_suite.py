@@ -389,6 +389,23 @@ async def test_cell_reading_tools(client: MCPClient, results: TestResults):
         results.add_result("read_cell - Specific", True)
     except Exception as e:
         results.add_result("read_cell - Specific", False, str(e))
+    
+    # Test 4: Read several cells in one call
+    print_test("read_cells - Batch retrieval")
+    try:
+        cells = await client.read_all_cells()
+        if cells:
+            indices = [len(cells) - 1, 0]
+            batch = await client.read_cells(indices)
+            assert isinstance(batch, list), "Should return list"
+            assert [cell['cell_index'] for cell in batch] == indices, f"Expected cells {indices} in order"
+            for cell in batch:
+                expected = cells[cell['cell_index']]
+                assert cell['cell_id'] == expected['cell_id'], f"Expected cell_id {expected['cell_id']}, got {cell.get('cell_id')}"
+                assert cell['content'] == expected['content'], "Batch content should match read_all_cells"
+        results.add_result("read_cells - Batch", True)
+    except Exception as e:
+        results.add_result("read_cells - Batch", False, str(e))
 
 async def test_markdown_cell_tools(client: MCPClient, results: TestResults):
     """Test markdown cell creation and manipulation tools"""
@@ -623,6 +640,33 @@ async def test_cell_manipulation_tools(client: MCPClient, results: TestResults):
         results.add_result("delete_cell - Remove", True)
     except Exception as e:
         results.add_result("delete_cell - Remove", False, str(e))
+    
+    # Test 3: Delete several cells in one update
+    print_test("delete_cells - Batch removal")
+    try:
+        await client.append_markdown_cell(f"# Batch delete A {test_id}")
+        await client.append_markdown_cell(f"# Batch delete B {test_id}")
+        cells_before = await client.read_all_cells()
+        initial_count = len(cells_before)
+        
+        batch = await client.delete_cells([initial_count - 1, initial_count - 2, initial_count])
+        statuses = [item.get("status") for item in batch]
+        assert statuses == ["deleted", "deleted", "out_of_range"], f"Unexpected statuses: {statuses}"
+        
+        # Retry-based verification: poll until cell count decreases
+        expected_count = initial_count - 2
+        cells_after = None
+        for attempt in range(20):  # Max 2 seconds of polling
+            cells_after = await client.read_all_cells()
+            if len(cells_after) == expected_count:
+                break
+            await asyncio.sleep(0.1)
+        else:
+            assert False, f"Expected {expected_count} cells after batch deletion, got {len(cells_after)} after 2s"
+        
+        results.add_result("delete_cells - Batch", True)
+    except Exception as e:
+        results.add_result("delete_cells - Batch", False, str(e))
 
 async def test_notebook_management_tools(client: MCPClient, results: TestResults):
     """Test notebook creation and management tools"""